@@ -5,16 +5,13 @@ A simple, user-friendly dashboard for fetching Bloomberg data
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 import sys
 import os
-import json
-import subprocess
-import sqlite3
+import importlib
+import logging
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add src to path
@@ -54,51 +51,153 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+PREVIEW_ROWS = 100
+
+LOG_FILE = Path('logs/fetcher.log')
+
+# Packages whose loggers the in-process fetches write to
+FETCH_LOGGERS = ('scripts', 'src')
+
+@st.cache_resource
+def configure_fetch_logging():
+    """Route fetch logging to LOG_FILE, once per process"""
+    # In-process fetches have no stdout to show; the handler goes on the fetch
+    # packages' loggers so Streamlit's own (root) logging is left alone
+    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5,
+                                  encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    for name in FETCH_LOGGERS:
+        fetch_logger = logging.getLogger(name)
+        fetch_logger.setLevel(logging.INFO)
+        fetch_logger.addHandler(handler)
+    return handler
+
+@st.cache_resource
+def get_fetch_executor():
+    """Single background worker shared by all sessions, so fetches never overlap"""
+    return ThreadPoolExecutor(max_workers=1)
+
+def tail_lines(path, n=50, block=4096):
+    """Return the last n lines of a file, reading backwards from EOF in blocks"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        buf = b''
+        while size > 0 and buf.count(b'\n') <= n:
+            read = min(block, size)
+            size -= read
+            f.seek(size)
+            buf = f.read(read) + buf
+    return buf.decode('utf-8', errors='replace').splitlines()[-n:]
+
+def read_log_errors(path, offset):
+    """ERROR messages written to a log file since a byte offset"""
+    if not path.exists():
+        return []
+    with open(path, 'rb') as f:
+        # A rotation since the offset was taken leaves a shorter, fresh file
+        if f.seek(0, os.SEEK_END) >= offset:
+            f.seek(offset)
+        else:
+            f.seek(0)
+        lines = f.read().decode('utf-8', errors='replace').splitlines()
+    return [line.split(' - ERROR - ', 1)[1] for line in lines if ' - ERROR - ' in line]
+
+@st.cache_data(ttl=2)
+def load_log_tail(path, mtime, n=50):
+    """Cached tail of a log file; mtime keys the cache to file changes"""
+    return tail_lines(path, n)
+
+@st.cache_resource
+def get_db():
+    """Process-wide DatabaseManager, shared across reruns and sessions"""
+    return DatabaseManager()
+
+@st.cache_resource
+def get_usage_monitor():
+    """Process-wide UsageMonitor, shared across reruns and sessions"""
+    return UsageMonitor({})
+
 class BloombergFetcherApp:
     def __init__(self):
-        self.db = DatabaseManager()
-        self.monitor = UsageMonitor({})
-
-    def get_database_stats(self):
-        """Get database statistics"""
+        self.db = get_db()
+        self.monitor = get_usage_monitor()
+
+    @st.cache_data(ttl=10)
+    def get_database_stats(_self):
+        """Get database statistics (cached for 10s across reruns)"""
+        return _self.db.get_dashboard_stats()
+
+    def get_data_version(self):
+        """Cheap change marker for the database: mtimes of the db and its WAL file"""
+        version = []
+        for path in (self.db.db_path, self.db.db_path + '-wal'):
+            try:
+                version.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                version.append(0)
+        return tuple(version)
+
+    @st.cache_data(ttl=10)
+    def get_recent_data(_self, data_version):
+        """Get the latest preview rows; data_version keys the cache to DB changes"""
+        return _self.db.get_recent_options(PREVIEW_ROWS)
+
+    @st.cache_data(ttl=30)
+    def get_average_prices(_self):
+        """Get per-ticker average option prices, aggregated in SQLite"""
+        return _self.db.get_average_price_by_underlying()
+
+    def check_bloomberg_connection(self):
+        """Test the Bloomberg connection once and remember the result in the session"""
         try:
-            conn = sqlite3.connect('./data/bloomberg_options.db')
-
-            # Count total records
-            cursor = conn.execute("SELECT COUNT(*) FROM options_data")
-            total_records = cursor.fetchone()[0]
-
-            # Get unique dates
-            cursor = conn.execute("SELECT COUNT(DISTINCT date(fetch_time)) FROM options_data")
-            unique_days = cursor.fetchone()[0] if cursor.fetchone() else 0
-
-            # Get latest fetch time
-            cursor = conn.execute("SELECT MAX(fetch_time) FROM options_data")
-            latest_fetch = cursor.fetchone()[0]
-
-            # Get unique tickers
-            cursor = conn.execute("SELECT COUNT(DISTINCT underlying) FROM options_data")
-            unique_tickers = cursor.fetchone()[0] if cursor.fetchone() else 0
-
-            conn.close()
-
-            return {
-                'total_records': total_records,
-                'unique_days': unique_days,
-                'latest_fetch': latest_fetch,
-                'unique_tickers': unique_tickers
-            }
-        except Exception as e:
-            return {'total_records': 0, 'unique_days': 0, 'latest_fetch': None, 'unique_tickers': 0}
+            from src.bloomberg_api import BloombergAPI
+            api = BloombergAPI()
+            connected = api.connect(max_retries=1)
+            api.disconnect()
+        except Exception:
+            connected = False
+
+        st.session_state.bb_connected = connected
+        st.session_state.bb_checked_at = datetime.now()
+        return connected
+
+    def render_connection_status(self):
+        """Show the last known connection status; only test when asked to"""
+        st.sidebar.subheader("🔗 Bloomberg Connection")
+
+        if st.sidebar.button("Test Connection", key="test_connection"):
+            with st.spinner("Connecting to Bloomberg..."):
+                self.check_bloomberg_connection()
+
+        checked_at = st.session_state.get('bb_checked_at')
+        if checked_at is None:
+            st.sidebar.info("Not tested yet")
+        elif st.session_state.get('bb_connected'):
+            st.sidebar.success(f"✅ Connected (checked {checked_at:%H:%M:%S})")
+        else:
+            st.sidebar.error(f"❌ Not connected (checked {checked_at:%H:%M:%S})")
 
     def render_dashboard(self):
         """Main dashboard"""
         st.title("📊 Bloomberg QQQ Options Fetcher")
         st.markdown("---")
 
+        self.render_connection_status()
+        st.sidebar.checkbox("🐞 Debug mode", key="debug")
+
         # Database status
         st.subheader("💾 Database Status")
-        stats = self.get_database_stats()
+        if st.button("🔄 Force Refresh", key="refresh_stats"):
+            st.cache_data.clear()
+        try:
+            stats = self.get_database_stats()
+        except Exception as e:
+            st.error(f"Error reading database stats: {e}")
+            if st.session_state.get('debug'):
+                st.exception(e)
+            stats = {'total_records': 0, 'unique_days': 0, 'latest_fetch': None, 'unique_tickers': 0}
 
         col1, col2, col3, col4 = st.columns(4)
 
@@ -127,11 +226,15 @@ class BloombergFetcherApp:
         with col1:
             st.markdown("### QQQ Historical Options")
             days = st.slider("Days of history", 1, 90, 30)
+            force = st.checkbox("Ignore API usage limits", value=False,
+                                help="Continue even if the estimated usage exceeds "
+                                     "the daily or monthly limit (--force)")
 
             if st.button("📈 Fetch QQQ Historical Data", key="qqq"):
-                with st.spinner("Starting QQQ fetch..."):
-                    command = f"python scripts/historical_fetch.py --days {days}"
-                    self.run_command(command)
+                argv = ['--days', str(days)]
+                if force:
+                    argv.append('--force')
+                self.start_fetch(f"QQQ historical fetch ({days} days)", 'historical_fetch', argv)
 
         with col2:
             st.markdown("### Individual Stock Options")
@@ -142,16 +245,19 @@ class BloombergFetcherApp:
             if option == "Single Stock":
                 ticker = st.text_input("Enter ticker (e.g., AAPL):", "AAPL")
                 if st.button("📊 Fetch Single Stock", key="single"):
-                    command = f"python scripts/constituents_fetch.py --ticker {ticker}"
-                    self.run_command(command)
+                    self.start_fetch(f"{ticker} options fetch",
+                                     'constituents_fetch', ['--ticker', ticker])
             else:
                 top_n = {"Top 5 Stocks": 5, "Top 10 Stocks": 10, "All 20 Stocks": None}[option]
                 if st.button(f"📊 Fetch {option}", key="multi"):
                     if top_n:
-                        command = f"python scripts/constituents_fetch.py --top {top_n}"
+                        argv = ['--top', str(top_n)]
                     else:
-                        command = "python scripts/constituents_fetch.py --all"
-                    self.run_command(command)
+                        argv = ['--all']
+                    self.start_fetch(f"{option} fetch", 'constituents_fetch', argv)
+
+        self.render_fetch_status()
+        self.render_logs()
 
         # Data viewer
         if stats['total_records'] > 0:
@@ -159,52 +265,81 @@ class BloombergFetcherApp:
             st.subheader("📋 Recent Data Preview")
 
             try:
-                conn = sqlite3.connect('./data/bloomberg_options.db')
-                df = pd.read_sql_query("""
-                    SELECT underlying, strike, expiry, option_type,
-                           px_last, px_bid, px_ask, volume, open_int,
-                           date(fetch_time) as fetch_date
-                    FROM options_data
-                    ORDER BY fetch_time DESC
-                    LIMIT 100
-                """, conn)
-                conn.close()
+                df = self.get_recent_data(self.get_data_version())
 
                 st.dataframe(df, use_container_width=True)
 
                 # Simple chart
-                if not df.empty and 'px_last' in df.columns:
-                    fig = px.histogram(df, x='underlying', y='px_last',
-                                     title="Average Option Prices by Ticker")
+                avg_df = self.get_average_prices()
+                if not avg_df.empty:
+                    import plotly.express as px  # deferred: only needed once data exists
+                    fig = px.bar(avg_df, x='underlying', y='avg_px_last',
+                                 title="Average Option Prices by Ticker")
                     st.plotly_chart(fig, use_container_width=True)
 
             except Exception as e:
                 st.error(f"Error loading data: {e}")
+                if st.session_state.get('debug'):
+                    st.exception(e)
+
+    def start_fetch(self, description, script, argv):
+        """Run scripts/<script>.py's main() on the background worker"""
+        future = st.session_state.get('fetch_future')
+        if future is not None and not future.done():
+            st.warning(f"⏳ Still running: {st.session_state.fetch_description}")
+            return
 
-    def run_command(self, command):
-        """Run a command and show results"""
         try:
-            st.info(f"Running: {command}")
-            result = subprocess.run(command.split(), capture_output=True, text=True, timeout=300)
-
-            if result.returncode == 0:
-                st.success("✅ Command completed successfully!")
-                if result.stdout:
-                    with st.expander("📄 Output"):
-                        st.text(result.stdout)
+            # Imported in-process once; later clicks reuse the loaded modules
+            module = importlib.import_module(f"scripts.{script}")
+            # Where this run's log output starts, to report its errors afterwards
+            st.session_state.fetch_log_offset = LOG_FILE.stat().st_size if LOG_FILE.exists() else 0
+            st.session_state.fetch_future = get_fetch_executor().submit(module.main, argv)
+            st.session_state.fetch_description = description
+            st.session_state.fetch_reported = False
+        except Exception as e:
+            st.error(f"❌ Error starting fetch: {e}")
+
+    def render_fetch_status(self):
+        """Show the state of the most recent background fetch"""
+        future = st.session_state.get('fetch_future')
+        if future is None:
+            return
+
+        description = st.session_state.fetch_description
+        if not future.done():
+            st.info(f"⏳ Running: {description}")
+            return
+
+        error = future.exception()
+        if error is None and future.result() == 0:
+            # New rows were written, drop the cached dashboard data once
+            if not st.session_state.fetch_reported:
+                st.cache_data.clear()
+                st.session_state.fetch_reported = True
+            st.success(f"✅ {description} completed successfully!")
+        elif error is not None:
+            st.error(f"❌ Error running {description}: {error}")
+        else:
+            # e.g. "Request would exceed API limits!" when the usage guard stops a fetch
+            errors = read_log_errors(LOG_FILE, st.session_state.get('fetch_log_offset', 0))
+            if errors:
+                st.error(f"❌ {description} failed: {errors[-1]}")
             else:
-                st.error("❌ Command failed!")
-                if result.stderr:
-                    with st.expander("📄 Error Details"):
-                        st.text(result.stderr)
+                st.error(f"❌ {description} failed! Check logs for details")
 
-        except subprocess.TimeoutExpired:
-            st.warning("⏱️ Command timed out (5 minutes limit)")
-        except Exception as e:
-            st.error(f"❌ Error running command: {e}")
+    def render_logs(self):
+        """Show the tail of the fetch log"""
+        if not LOG_FILE.exists():
+            return
+
+        with st.expander("📄 Recent Logs"):
+            lines = load_log_tail(str(LOG_FILE), LOG_FILE.stat().st_mtime)
+            st.code("\n".join(lines) if lines else "(empty)")
 
 def main():
     """Main app entry point"""
+    configure_fetch_logging()
     app = BloombergFetcherApp()
     app.render_dashboard()
 
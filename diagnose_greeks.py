@@ -6,26 +6,64 @@ Enhanced Greeks Diagnostic Tool - Definitive Problem Identification
 
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(_HERE)
 
 from src.bloomberg_api import BloombergAPI
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-import logging
+from dataclasses import dataclass
 import time
 import re
+import bisect
+import io
+import functools
+from contextlib import redirect_stdout
 import ast
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# 整行比對被切片為前6個欄位的 OPTION_FIELDS
+_FIELD_SLICE_RE = re.compile(r'^.*self\.OPTION_FIELDS\[:6\].*$', re.MULTILINE)
+_NEWLINE_RE = re.compile(r'\n')
+
+def _notna_count(series):
+    """計算非空值數量；浮點欄位直接在NumPy陣列上計算，避免建立中間Series"""
+    if series.dtype.kind == 'f':
+        return int(np.count_nonzero(~np.isnan(series.to_numpy(dtype=np.float64, copy=False))))
+    return int(series.notna().sum())
+
+def _buffered_output(method):
+    """將方法內的 print 輸出先寫入記憶體緩衝區，結束時一次寫出並 flush"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        buf = io.StringIO()
+        try:
+            with redirect_stdout(buf):
+                return method(*args, **kwargs)
+        finally:
+            sys.stdout.write(buf.getvalue())
+            sys.stdout.flush()
+    return wrapper
+
+@dataclass
+class CodeProblem:
+    """程式碼分析發現的單一問題"""
+    __slots__ = ('file', 'line', 'problem', 'current', 'fix')
+    file: str
+    line: int
+    problem: str
+    current: str
+    fix: str
 
 class GreeksDiagnostic:
     def __init__(self):
         self.api = BloombergAPI()
         self.results = {}
-        self.test_results = []
+        # 欄位導向儲存: 每個欄位一個list，報告時一次轉成DataFrame
+        self.test_results = {'test': [], 'success': [], 'details': [], 'data_count': [], 'timestamp': []}
         self.problems_found = []  # 儲存發現的問題
         self.solutions = []  # 儲存解決方案
+        self._ref_cache = {}  # (tickers, fields) -> 參考資料結果
 
         # 定義測試欄位
         self.greeks = ['DELTA', 'GAMMA', 'THETA', 'VEGA', 'RHO']
@@ -39,22 +77,72 @@ class GreeksDiagnostic:
             "AAPL US 12/20/25 C150 Equity",
         ]
 
-    def log_test_result(self, test_name, success, details, data_count=0):
-        """記錄測試結果"""
-        result = {
-            'test': test_name,
-            'success': success,
-            'details': details,
-            'data_count': data_count,
-            'timestamp': datetime.now().strftime('%H:%M:%S')
-        }
-        self.test_results.append(result)
+    def log_test_result(self, test_name, success, details, data_count=0, ts=None):
+        """記錄測試結果 (ts: 呼叫端預先格式化的時間，避免每筆重新格式化)"""
+        results = self.test_results
+        results['test'].append(test_name)
+        results['success'].append(bool(success))
+        results['details'].append(details)
+        results['data_count'].append(data_count)
+        results['timestamp'].append(ts or datetime.now().strftime('%H:%M:%S'))
 
         status = "✅" if success else "❌"
         print(f"{status} {test_name}: {details}")
         if data_count > 0:
             print(f"   📊 資料筆數: {data_count}")
 
+    def find_field_slices(self, path):
+        """以AST找出所有 OPTION_FIELDS[:6] 切片，回傳 (行號, 原始行, 修正後的行)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        lines = content.splitlines()
+
+        try:
+            tree = ast.parse(content)
+        except SyntaxError:
+            # 無法解析時退回正規表示式逐行比對
+            newlines = [m.start() for m in _NEWLINE_RE.finditer(content)]
+            return [(bisect.bisect_left(newlines, m.start()) + 1, m.group(),
+                     m.group().replace('[:6]', '[:11]'))
+                    for m in _FIELD_SLICE_RE.finditer(content)]
+
+        hits = []
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice)):
+                continue
+            sl = node.slice
+            target = node.value
+            if (sl.lower is None and sl.step is None
+                    and isinstance(sl.upper, ast.Constant) and sl.upper.value == 6
+                    and isinstance(target, ast.Attribute) and target.attr == 'OPTION_FIELDS'):
+                line = lines[node.lineno - 1]
+                fix = line
+                if node.end_lineno == node.lineno:
+                    # col_offset 以UTF-8位元組計算
+                    raw = line.encode('utf-8')
+                    fixed = f"{ast.get_source_segment(content, target)}[:11]".encode('utf-8')
+                    fix = (raw[:node.col_offset] + fixed + raw[node.end_col_offset:]).decode('utf-8')
+                hits.append((node.lineno, line, fix))
+
+        return sorted(hits)
+
+    def _cached_ref(self, tickers, fields):
+        """同一次診斷中相同的參考資料請求只送一次"""
+        key = (tuple(tickers), frozenset(fields))
+        if key not in self._ref_cache:
+            data = self.api.fetch_reference_data(list(tickers), list(fields))
+            if data.empty:
+                return data  # 不快取失敗/空結果，下次仍會重試
+            self._ref_cache[key] = data
+        return self._ref_cache[key].copy()
+
+    def ensure_connected(self):
+        """只在尚未連線時建立連線，整個診斷共用同一個session"""
+        if not self.api.connected:
+            self.api.connect()
+        return self.api.connected
+
+    @_buffered_output
     def analyze_codebase_problems(self):
         """分析程式碼找出確切問題"""
         print("\n" + "="*60)
@@ -62,51 +150,44 @@ class GreeksDiagnostic:
         print("="*60)
 
         # 檢查 qqq_options_fetcher.py
-        fetcher_path = os.path.join(os.path.dirname(__file__), 'src', 'qqq_options_fetcher.py')
+        fetcher_path = os.path.join(_HERE, 'src', 'qqq_options_fetcher.py')
         if os.path.exists(fetcher_path):
             print(f"\n檢查檔案: {fetcher_path}")
-            with open(fetcher_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            for i, line in enumerate(lines, 1):
-                if 'self.OPTION_FIELDS[:6]' in line:
-                    print(f"\n🔴 發現問題在第 {i} 行:")
-                    print(f"   {line.strip()}")
-                    print(f"\n   💡 問題說明:")
-                    print(f"   這行限制只抓取前6個欄位: [PX_LAST, PX_BID, PX_ASK, PX_VOLUME, OPEN_INT, IVOL_MID]")
-                    print(f"   Greeks (DELTA, GAMMA, THETA, VEGA, RHO) 是第7-11個欄位，被跳過了！")
-
-                    self.problems_found.append({
-                        'file': 'src/qqq_options_fetcher.py',
-                        'line': i,
-                        'problem': '欄位陣列被切片為[:6]，排除了Greeks',
-                        'current': line.strip(),
-                        'fix': line.replace('[:6]', '[:11]').strip()
-                    })
-
-                    print(f"\n   ✅ 解決方案:")
-                    print(f"   第 {i} 行從: {line.strip()}")
-                    print(f"   改為: {line.replace('[:6]', '[:11]').strip()}")
+
+            for i, line, fixed in self.find_field_slices(fetcher_path):
+                print(f"\n🔴 發現問題在第 {i} 行:")
+                print(f"   {line.strip()}")
+                print(f"\n   💡 問題說明:")
+                print(f"   這行限制只抓取前6個欄位: [PX_LAST, PX_BID, PX_ASK, PX_VOLUME, OPEN_INT, IVOL_MID]")
+                print(f"   Greeks (DELTA, GAMMA, THETA, VEGA, RHO) 是第7-11個欄位，被跳過了！")
+
+                self.problems_found.append(CodeProblem(
+                    file='src/qqq_options_fetcher.py',
+                    line=i,
+                    problem='欄位陣列被切片為[:6]，排除了Greeks',
+                    current=line.strip(),
+                    fix=fixed.strip()
+                ))
+
+                print(f"\n   ✅ 解決方案:")
+                print(f"   第 {i} 行從: {line.strip()}")
+                print(f"   改為: {fixed.strip()}")
 
         # 檢查 constituents_fetcher.py
-        constituents_path = os.path.join(os.path.dirname(__file__), 'src', 'constituents_fetcher.py')
+        constituents_path = os.path.join(_HERE, 'src', 'constituents_fetcher.py')
         if os.path.exists(constituents_path):
             print(f"\n檢查檔案: {constituents_path}")
-            with open(constituents_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-
-            for i, line in enumerate(lines, 1):
-                if 'self.OPTION_FIELDS[:' in line and '[:6]' in line:
-                    print(f"\n🔴 類似問題在第 {i} 行:")
-                    print(f"   {line.strip()}")
-                    self.problems_found.append({
-                        'file': 'src/constituents_fetcher.py',
-                        'line': i,
-                        'problem': '欄位陣列也被限制',
-                        'current': line.strip(),
-                        'fix': line.replace('[:6]', '[:11]')
-                    })
+
+            for i, line, fixed in self.find_field_slices(constituents_path):
+                print(f"\n🔴 類似問題在第 {i} 行:")
+                print(f"   {line.strip()}")
+                self.problems_found.append(CodeProblem(
+                    file='src/constituents_fetcher.py',
+                    line=i,
+                    problem='欄位陣列也被限制',
+                    current=line.strip(),
+                    fix=fixed
+                ))
 
     def check_async_blp_comparison(self):
         """檢查async_blp可用性及比較"""
@@ -130,7 +211,7 @@ class GreeksDiagnostic:
         print("🔗 Bloomberg API 連線測試")
         print("="*60)
 
-        if not self.api.connect():
+        if not self.ensure_connected():
             print("\n❌ 無法連線到Bloomberg API")
             print("這是次要問題 - 先修復程式碼問題！")
             self.show_final_diagnosis()
@@ -164,8 +245,9 @@ class GreeksDiagnostic:
                 print("🎯 問題確認在程式碼，不在API")
 
                 # 顯示取得的Greeks值
+                cols = set(data.columns)
                 for greek in self.greeks:
-                    if greek in data.columns:
+                    if greek in cols:
                         value = data[greek].iloc[0]
                         if pd.notna(value):
                             print(f"   {greek}: {value:.4f}")
@@ -179,42 +261,49 @@ class GreeksDiagnostic:
         except Exception as e:
             print(f"\n⚠️ 驗證測試錯誤: {e}")
 
+    @_buffered_output
     def show_final_diagnosis(self):
         """顯示最終診斷結果"""
         print("\n" + "="*80)
         print("🎯 最終診斷結果")
         print("="*80)
 
-        if self.problems_found:
-            print("\n🔴 根本原因已確認:")
-            print("\n程式碼刻意限制欄位抓取以提升效能,")
-            print("但這排除了Greeks的抓取。")
-
-            print("\n📋 必要修復:")
-            for i, problem in enumerate(self.problems_found, 1):
-                print(f"\n{i}. 檔案: {problem['file']}")
-                print(f"   行數: {problem['line']}")
-                print(f"   目前: {problem['current']}")
-                print(f"   修改為: {problem['fix']}")
-
-            print("\n🛠️ 快速修復指令:")
-            print("\n對於QQQ選擇權:")
-            print("sed -i 's/self.OPTION_FIELDS\[:6\]/self.OPTION_FIELDS[:11]/' src/qqq_options_fetcher.py")
-
-            if any('constituents' in p['file'] for p in self.problems_found):
-                print("\n對於成分股選擇權:")
-                print("sed -i 's/self.OPTION_FIELDS\[:6\]/self.OPTION_FIELDS[:11]/' src/constituents_fetcher.py")
-
-            print("\n✅ 修復後預期結果:")
-            print("Greeks (Delta, Gamma, Theta, Vega, Rho) 將包含在抓取的資料中")
-
-        else:
+        if not self.problems_found:
             print("\n⚠️ 未發現明顯的程式碼問題。")
             print("請檢查:")
             print("1. Bloomberg Terminal API權限")
             print("2. 市場時間 (選擇權Greeks在市場時間可用)")
             print("3. 有效的選擇權標的")
+            self._print_diagnosis_footer()
+            return
 
+        has_constituents = any(p.file.endswith('constituents_fetcher.py') for p in self.problems_found)
+
+        print("\n🔴 根本原因已確認:")
+        print("\n程式碼刻意限制欄位抓取以提升效能,")
+        print("但這排除了Greeks的抓取。")
+
+        print("\n📋 必要修復:")
+        for i, problem in enumerate(self.problems_found, 1):
+            print(f"\n{i}. 檔案: {problem.file}")
+            print(f"   行數: {problem.line}")
+            print(f"   目前: {problem.current}")
+            print(f"   修改為: {problem.fix}")
+
+        print("\n🛠️ 快速修復指令:")
+        print("\n對於QQQ選擇權:")
+        print(r"sed -i 's/self.OPTION_FIELDS\[:6\]/self.OPTION_FIELDS[:11]/' src/qqq_options_fetcher.py")
+
+        if has_constituents:
+            print("\n對於成分股選擇權:")
+            print(r"sed -i 's/self.OPTION_FIELDS\[:6\]/self.OPTION_FIELDS[:11]/' src/constituents_fetcher.py")
+
+        print("\n✅ 修復後預期結果:")
+        print("Greeks (Delta, Gamma, Theta, Vega, Rho) 將包含在抓取的資料中")
+        self._print_diagnosis_footer()
+
+    def _print_diagnosis_footer(self):
+        """診斷結束分隔線"""
         print("\n" + "="*80)
         print("診斷結束")
         print("="*80)
@@ -223,14 +312,16 @@ class GreeksDiagnostic:
         """測試Bloomberg連線"""
         print("\n[測試1] 檢查Bloomberg連線...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
 
         try:
-            success = self.api.connect()
+            success = self.ensure_connected()
             if success:
                 self.log_test_result(
                     "Bloomberg連線",
                     True,
-                    f"成功連線到 {self.api.host}:{self.api.port}"
+                    f"成功連線到 {self.api.host}:{self.api.port}",
+                    ts=ts
                 )
 
                 # 檢查服務
@@ -238,71 +329,88 @@ class GreeksDiagnostic:
                     self.log_test_result(
                         "Bloomberg服務",
                         True,
-                        "Reference Data服務可用"
+                        "Reference Data服務可用",
+                        ts=ts
                     )
                 else:
                     self.log_test_result(
                         "Bloomberg服務",
                         False,
-                        "無法開啟Reference Data服務"
+                        "無法開啟Reference Data服務",
+                        ts=ts
                     )
             else:
                 self.log_test_result(
                     "Bloomberg連線",
                     False,
-                    "無法連線到Bloomberg Terminal"
+                    "無法連線到Bloomberg Terminal",
+                    ts=ts
                 )
 
         except Exception as e:
             self.log_test_result(
                 "Bloomberg連線",
                 False,
-                f"連線錯誤: {e}"
+                f"連線錯誤: {e}",
+                ts=ts
             )
 
     def test_single_greek_fields(self):
         """逐一測試每個Greek欄位"""
         print("\n[測試2] 逐一測試Greek欄位...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
+
+        if not self.api.connected:
+            print("⚠️ 未連線到Bloomberg，略過此測試")
+            return
 
         ticker = "QQQ US 12/20/25 C500 Equity"
         today = datetime.now().strftime('%Y%m%d')
         yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
 
-        for greek in self.greeks:
-            try:
-                # 測試歷史資料
-                data_hist = self.api.fetch_historical_data(
-                    [ticker],
-                    [greek],
-                    yesterday,
-                    today,
-                    "DAILY"
-                )
+        try:
+            # 一次請求所有Greeks，再逐欄統計
+            data_hist = self.api.fetch_historical_data(
+                [ticker],
+                self.greeks,
+                yesterday,
+                today,
+                "DAILY"
+            )
 
-                hist_success = not data_hist.empty and len(data_hist) > 0
-                hist_count = len(data_hist) if not data_hist.empty else 0
+            cols = set(data_hist.columns)
+            for greek in self.greeks:
+                col = f"{ticker}_{greek}"
+                hist_count = _notna_count(data_hist[col]) if col in cols else 0
+                hist_success = hist_count > 0
 
                 self.log_test_result(
                     f"歷史資料-{greek}",
                     hist_success,
                     f"{'有資料' if hist_success else '無資料'}",
-                    hist_count
+                    hist_count,
+                    ts=ts
                 )
 
-                time.sleep(0.5)  # 避免請求過快
-
-            except Exception as e:
+        except Exception as e:
+            for greek in self.greeks:
                 self.log_test_result(
                     f"歷史資料-{greek}",
                     False,
-                    f"錯誤: {str(e)[:50]}..."
+                    f"錯誤: {str(e)[:50]}...",
+                    ts=ts
                 )
 
     def test_different_apis(self):
         """測試不同的API方法"""
         print("\n[測試3] 測試不同API方法...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
+
+        if not self.api.connected:
+            print("⚠️ 未連線到Bloomberg，略過此測試")
+            return
 
         ticker = "QQQ US 12/20/25 C500 Equity"
         test_fields = ['PX_LAST', 'DELTA']
@@ -324,7 +432,8 @@ class GreeksDiagnostic:
                 "歷史資料API",
                 hist_success,
                 f"回傳 {len(data_hist)} 筆資料" if hist_success else "無資料",
-                len(data_hist) if hist_success else 0
+                len(data_hist) if hist_success else 0,
+                ts=ts
             )
 
             if hist_success:
@@ -333,98 +442,122 @@ class GreeksDiagnostic:
                     cols_with_field = [col for col in data_hist.columns if field in col]
                     if cols_with_field:
                         sample_col = cols_with_field[0]
-                        non_null_count = data_hist[sample_col].notna().sum()
+                        non_null_count = _notna_count(data_hist[sample_col])
                         self.log_test_result(
                             f"  └─ {field}欄位",
                             non_null_count > 0,
                             f"{non_null_count}/{len(data_hist)} 有值",
-                            non_null_count
+                            non_null_count,
+                            ts=ts
                         )
 
         except Exception as e:
             self.log_test_result(
                 "歷史資料API",
                 False,
-                f"錯誤: {str(e)[:50]}..."
+                f"錯誤: {str(e)[:50]}...",
+                ts=ts
             )
 
         time.sleep(1)
 
         # 測試參考資料API
         try:
-            data_ref = self.api.fetch_reference_data([ticker], test_fields)
+            data_ref = self._cached_ref([ticker], test_fields)
 
             ref_success = not data_ref.empty
             self.log_test_result(
                 "參考資料API",
                 ref_success,
                 f"回傳 {len(data_ref)} 筆資料" if ref_success else "無資料",
-                len(data_ref) if ref_success else 0
+                len(data_ref) if ref_success else 0,
+                ts=ts
             )
 
             if ref_success:
                 # 檢查哪些欄位有資料
+                cols = set(data_ref.columns)
                 for field in test_fields:
-                    if field in data_ref.columns:
-                        non_null_count = data_ref[field].notna().sum()
+                    if field in cols:
+                        non_null_count = _notna_count(data_ref[field])
                         self.log_test_result(
                             f"  └─ {field}欄位",
                             non_null_count > 0,
                             f"{non_null_count}/{len(data_ref)} 有值",
-                            non_null_count
+                            non_null_count,
+                            ts=ts
                         )
 
         except Exception as e:
             self.log_test_result(
                 "參考資料API",
                 False,
-                f"錯誤: {str(e)[:50]}..."
+                f"錯誤: {str(e)[:50]}...",
+                ts=ts
             )
 
     def test_different_securities(self):
         """測試不同的選擇權標的"""
         print("\n[測試4] 測試不同標的...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
 
-        test_fields = ['PX_LAST', 'DELTA', 'GAMMA']
+        if not self.api.connected:
+            print("⚠️ 未連線到Bloomberg，略過此測試")
+            return
 
-        for ticker in self.test_tickers:
-            try:
-                # 只測試參考資料（較快）
-                data = self.api.fetch_reference_data([ticker], test_fields)
+        test_fields = ['PX_LAST', 'DELTA', 'GAMMA']
 
-                success = not data.empty
+        try:
+            # 只測試參考資料（較快）；所有標的合併為一次請求
+            all_data = self._cached_ref(self.test_tickers, test_fields)
+        except Exception as e:
+            for ticker in self.test_tickers:
                 self.log_test_result(
                     f"標的: {ticker.split()[0]}",
-                    success,
-                    f"{'有資料' if success else '無資料'}",
-                    len(data) if success else 0
+                    False,
+                    f"錯誤: {str(e)[:50]}...",
+                    ts=ts
                 )
+            return
 
-                if success:
-                    # 檢查DELTA是否有值
-                    if 'DELTA' in data.columns:
-                        delta_count = data['DELTA'].notna().sum()
-                        self.log_test_result(
-                            f"  └─ DELTA值",
-                            delta_count > 0,
-                            f"{delta_count}/{len(data)} 有值",
-                            delta_count
-                        )
+        for ticker in self.test_tickers:
+            # 每個有效標的在回傳中佔一列 (ticker 欄位)
+            if 'ticker' in all_data.columns:
+                data = all_data[all_data['ticker'] == ticker]
+            else:
+                data = all_data
 
-                time.sleep(0.5)
+            success = not data.empty
+            self.log_test_result(
+                f"標的: {ticker.split()[0]}",
+                success,
+                f"{'有資料' if success else '無資料'}",
+                len(data) if success else 0,
+                ts=ts
+            )
 
-            except Exception as e:
-                self.log_test_result(
-                    f"標的: {ticker.split()[0]}",
-                    False,
-                    f"錯誤: {str(e)[:50]}..."
-                )
+            if success:
+                # 檢查DELTA是否有值
+                if 'DELTA' in data.columns:
+                    delta_count = _notna_count(data['DELTA'])
+                    self.log_test_result(
+                        f"  └─ DELTA值",
+                        delta_count > 0,
+                        f"{delta_count}/{len(data)} 有值",
+                        delta_count,
+                        ts=ts
+                    )
 
     def test_field_combinations(self):
         """測試不同欄位組合"""
         print("\n[測試5] 測試欄位組合...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
+
+        if not self.api.connected:
+            print("⚠️ 未連線到Bloomberg，略過此測試")
+            return
 
         ticker = "QQQ US 12/20/25 C500 Equity"
 
@@ -439,46 +572,54 @@ class GreeksDiagnostic:
             (self.price_fields + self.greeks[:2], "價格+兩個Greeks"),
         ]
 
-        for fields, description in combinations:
-            try:
-                data = self.api.fetch_reference_data([ticker], fields)
-
-                success = not data.empty
+        # 所有組合都是同一標的的欄位子集: 一次請求聯集，子集在本地切出
+        all_fields = list(dict.fromkeys(f for fields, _ in combinations for f in fields))
+        try:
+            all_data = self._cached_ref([ticker], all_fields)
+        except Exception as e:
+            for _, description in combinations:
                 self.log_test_result(
                     description,
-                    success,
-                    f"{'成功' if success else '失敗'}",
-                    len(data) if success else 0
+                    False,
+                    f"錯誤: {str(e)[:50]}...",
+                    ts=ts
                 )
+            return
 
-                if success:
-                    # 統計有值的欄位
-                    non_null_fields = []
-                    for field in fields:
-                        if field in data.columns:
-                            if data[field].notna().any():
-                                non_null_fields.append(field)
+        cols = set(all_data.columns)
+        for fields, description in combinations:
+            present = [field for field in fields if field in cols]
 
-                    if non_null_fields:
-                        self.log_test_result(
-                            f"  └─ 有值欄位",
-                            True,
-                            f"{', '.join(non_null_fields)}"
-                        )
+            success = not all_data.empty and bool(present)
+            self.log_test_result(
+                description,
+                success,
+                f"{'成功' if success else '失敗'}",
+                len(all_data) if success else 0,
+                ts=ts
+            )
 
-                time.sleep(0.5)
+            if success:
+                # 統計有值的欄位
+                non_null_fields = [field for field in present if all_data[field].notna().any()]
 
-            except Exception as e:
-                self.log_test_result(
-                    description,
-                    False,
-                    f"錯誤: {str(e)[:50]}..."
-                )
+                if non_null_fields:
+                    self.log_test_result(
+                        f"  └─ 有值欄位",
+                        True,
+                        f"{', '.join(non_null_fields)}",
+                        ts=ts
+                    )
 
     def test_time_ranges(self):
         """測試不同時間範圍"""
         print("\n[測試6] 測試時間範圍...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
+
+        if not self.api.connected:
+            print("⚠️ 未連線到Bloomberg，略過此測試")
+            return
 
         ticker = "QQQ US 12/20/25 C500 Equity"
         test_fields = ['PX_LAST', 'DELTA']
@@ -486,47 +627,59 @@ class GreeksDiagnostic:
         today = datetime.now()
 
         time_ranges = [
-            (today.strftime('%Y%m%d'), today.strftime('%Y%m%d'), "當日"),
-            ((today - timedelta(days=1)).strftime('%Y%m%d'), today.strftime('%Y%m%d'), "過去2天"),
-            ((today - timedelta(days=7)).strftime('%Y%m%d'), today.strftime('%Y%m%d'), "過去1週"),
-            ((today - timedelta(days=30)).strftime('%Y%m%d'), today.strftime('%Y%m%d'), "過去1月"),
+            (today, "當日"),
+            (today - timedelta(days=1), "過去2天"),
+            (today - timedelta(days=7), "過去1週"),
+            (today - timedelta(days=30), "過去1月"),
         ]
 
-        for start_date, end_date, description in time_ranges:
-            try:
-                data = self.api.fetch_historical_data(
-                    [ticker],
-                    test_fields,
-                    start_date,
-                    end_date,
-                    "DAILY"
-                )
+        try:
+            # 只請求最寬的範圍，較短範圍在本地切片
+            widest_start = min(start for start, _ in time_ranges)
+            data = self.api.fetch_historical_data(
+                [ticker],
+                test_fields,
+                widest_start.strftime('%Y%m%d'),
+                today.strftime('%Y%m%d'),
+                "DAILY"
+            )
+            if not data.empty:
+                data = data.sort_index()
+
+            for start_date, description in time_ranges:
+                window = data.loc[start_date.strftime('%Y-%m-%d'):] if not data.empty else data
 
-                success = not data.empty
+                success = not window.empty
                 self.log_test_result(
                     f"時間範圍: {description}",
                     success,
                     f"{'有資料' if success else '無資料'}",
-                    len(data) if success else 0
+                    len(window) if success else 0,
+                    ts=ts
                 )
 
-                time.sleep(0.5)
-
-            except Exception as e:
+        except Exception as e:
+            for _, description in time_ranges:
                 self.log_test_result(
                     f"時間範圍: {description}",
                     False,
-                    f"錯誤: {str(e)[:50]}..."
+                    f"錯誤: {str(e)[:50]}...",
+                    ts=ts
                 )
 
     def test_reference_data(self):
         """測試即時參考資料"""
         print("\n[測試7] 測試即時參考資料...")
         print("-" * 40)
+        ts = time.strftime('%H:%M:%S')
+
+        if not self.api.connected:
+            print("⚠️ 未連線到Bloomberg，略過此測試")
+            return
 
         # 測試QQQ現貨
         try:
-            qqq_data = self.api.fetch_reference_data(
+            qqq_data = self._cached_ref(
                 ["QQQ US Equity"],
                 ['PX_LAST', 'PX_BID', 'PX_ASK']
             )
@@ -536,7 +689,8 @@ class GreeksDiagnostic:
                 "QQQ現貨價格",
                 success,
                 f"{'成功取得' if success else '無法取得'}",
-                len(qqq_data) if success else 0
+                len(qqq_data) if success else 0,
+                ts=ts
             )
 
             if success and 'PX_LAST' in qqq_data.columns:
@@ -544,14 +698,16 @@ class GreeksDiagnostic:
                 self.log_test_result(
                     "  └─ QQQ價格",
                     True,
-                    f"${qqq_price:.2f}" if pd.notna(qqq_price) else "無價格"
+                    f"${qqq_price:.2f}" if pd.notna(qqq_price) else "無價格",
+                    ts=ts
                 )
 
         except Exception as e:
             self.log_test_result(
                 "QQQ現貨價格",
                 False,
-                f"錯誤: {str(e)[:50]}..."
+                f"錯誤: {str(e)[:50]}...",
+                ts=ts
             )
 
         time.sleep(0.5)
@@ -561,14 +717,15 @@ class GreeksDiagnostic:
         all_fields = self.price_fields + self.other_fields + self.greeks
 
         try:
-            option_data = self.api.fetch_reference_data([ticker], all_fields)
+            option_data = self._cached_ref([ticker], all_fields)
 
             success = not option_data.empty
             self.log_test_result(
                 "選擇權完整資料",
                 success,
                 f"{'成功取得' if success else '無法取得'}",
-                len(option_data) if success else 0
+                len(option_data) if success else 0,
+                ts=ts
             )
 
             if success:
@@ -579,25 +736,29 @@ class GreeksDiagnostic:
                     (self.greeks, "Greeks欄位")
                 ]
 
+                cols = set(option_data.columns)
                 for fields, group_name in field_groups:
                     available_fields = []
                     for field in fields:
-                        if field in option_data.columns and option_data[field].notna().any():
+                        if field in cols and option_data[field].notna().any():
                             available_fields.append(field)
 
                     self.log_test_result(
                         f"  └─ {group_name}",
                         len(available_fields) > 0,
-                        f"{len(available_fields)}/{len(fields)} 可用: {', '.join(available_fields) if available_fields else '無'}"
+                        f"{len(available_fields)}/{len(fields)} 可用: {', '.join(available_fields) if available_fields else '無'}",
+                        ts=ts
                     )
 
         except Exception as e:
             self.log_test_result(
                 "選擇權完整資料",
                 False,
-                f"錯誤: {str(e)[:50]}..."
+                f"錯誤: {str(e)[:50]}...",
+                ts=ts
             )
 
+    @_buffered_output
     def generate_report(self):
         """產生診斷報告"""
         print("\n" + "="*80)
@@ -605,8 +766,9 @@ class GreeksDiagnostic:
         print("="*80)
 
         # 統計測試結果
-        total_tests = len(self.test_results)
-        successful_tests = sum(1 for r in self.test_results if r['success'])
+        df = pd.DataFrame(self.test_results)
+        total_tests = len(df)
+        successful_tests = int(df['success'].sum())
         failed_tests = total_tests - successful_tests
 
         print(f"📊 測試統計:")
@@ -615,27 +777,30 @@ class GreeksDiagnostic:
         print(f"   失敗: {failed_tests} ❌")
         print(f"   成功率: {(successful_tests/total_tests)*100:.1f}%")
 
+        # 向量化分類所有結果，後續統計不再重複比對子字串
+        names = df['test']
+        greeks_tests = df[names.str.contains('|'.join(map(re.escape, self.greeks)))]
+        connection_success = bool(df.loc[names.str.contains('連線', regex=False), 'success'].any())
+        price_success = bool(df.loc[names.str.contains('PX_LAST|價格'), 'success'].any())
+
         # 分析Greeks可用性
         print(f"\n🎯 Greeks 可用性分析:")
-        greeks_tests = [r for r in self.test_results if any(g in r['test'] for g in self.greeks)]
 
-        if greeks_tests:
-            greeks_success = [r for r in greeks_tests if r['success']]
+        if not greeks_tests.empty:
+            greeks_success = greeks_tests[greeks_tests['success']]
             print(f"   Greeks相關測試: {len(greeks_success)}/{len(greeks_tests)} 成功")
 
-            if greeks_success:
+            if not greeks_success.empty:
                 print(f"   ✅ 成功的Greeks測試:")
-                for test in greeks_success[:5]:  # 顯示前5個
-                    print(f"      - {test['test']}: {test['details']}")
+                for test in greeks_success.head(5).itertuples():  # 顯示前5個
+                    print(f"      - {test.test}: {test.details}")
             else:
                 print(f"   ❌ 所有Greeks測試都失敗")
 
         # 提供建議
         print(f"\n💡 建議:")
 
-        connection_success = any(r['success'] for r in self.test_results if '連線' in r['test'])
-        price_success = any(r['success'] for r in self.test_results if 'PX_LAST' in r['test'] or '價格' in r['test'])
-        greeks_any_success = any(r['success'] for r in self.test_results if any(g in r['test'] for g in self.greeks))
+        greeks_any_success = bool(greeks_tests['success'].any())
 
         if not connection_success:
             print("   🔴 優先解決: Bloomberg連線問題")
@@ -696,7 +861,8 @@ def main():
     finally:
         # 確保API連線關閉
         try:
-            diagnostic.api.disconnect()
+            if diagnostic.api.connected:
+                diagnostic.api.disconnect()
         except:
             pass
 
@@ -7,6 +7,7 @@
 import subprocess
 import sys
 import os
+import importlib.util
 from datetime import datetime
 
 def run_command(cmd, description):
@@ -15,16 +16,20 @@ def run_command(cmd, description):
     print(f"🔄 {description}")
     print(f"{'='*60}")
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
+        # 即時串流輸出 (stderr 合併到 stdout)，不在記憶體中累積整份輸出
+        # 子程序輸出到管道時預設為區塊緩衝，設定 PYTHONUNBUFFERED 讓輸出逐行送達
+        process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1,
+                                   env={**os.environ, 'PYTHONUNBUFFERED': '1'})
+        for line in process.stdout:
+            sys.stdout.write(line)
+        process.wait()
+
+        if process.returncode == 0:
             print(f"✅ 成功！")
-            if result.stdout:
-                print(result.stdout)
             return True
         else:
-            print(f"❌ 失敗")
-            if result.stderr:
-                print(f"錯誤: {result.stderr}")
+            print(f"❌ 失敗 (代碼 {process.returncode})")
             return False
     except Exception as e:
         print(f"❌ 執行錯誤: {e}")
@@ -70,8 +75,9 @@ def main():
 
         # 先檢查 Bloomberg API
         print("\n🔍 檢查 Bloomberg API...")
-        check_cmd = "python -c \"import blpapi; print('✅ Bloomberg API 已安裝')\""
-        if not run_command(check_cmd, "檢查 Bloomberg API"):
+        if importlib.util.find_spec("blpapi") is not None:
+            print("✅ Bloomberg API 已安裝")
+        else:
             print("\n⚠️  Bloomberg API 未安裝，正在安裝...")
             run_command("python setup_bloomberg_terminal.py", "安裝 Bloomberg API")
 
@@ -8,8 +8,16 @@ import sys
 import os
 import subprocess
 import time
+import mmap
+import importlib.util
+from functools import lru_cache
 from datetime import datetime
 
+@lru_cache(maxsize=None)
+def has_module(name):
+    """檢查模組是否可匯入 (只查找，不執行模組程式碼)"""
+    return importlib.util.find_spec(name) is not None
+
 def check_python_version():
     """檢查Python版本"""
     version = sys.version_info
@@ -21,13 +29,11 @@ def check_python_version():
 
 def check_blpapi():
     """檢查Bloomberg API是否安裝"""
-    try:
-        import blpapi
+    if has_module("blpapi"):
         print("✅ Bloomberg API (blpapi) 已安裝")
         return True
-    except ImportError:
-        print("❌ Bloomberg API (blpapi) 未安裝")
-        return False
+    print("❌ Bloomberg API (blpapi) 未安裝")
+    return False
 
 def install_blpapi():
     """安裝Bloomberg API"""
@@ -51,23 +57,27 @@ def install_blpapi():
 def install_requirements():
     """安裝所有必要套件"""
     print("\n📦 安裝必要套件...")
+    # (匯入名稱, pip 套件需求)
     packages = [
-        "pandas>=1.3.0",
-        "numpy>=1.21.0",
-        "pyyaml>=6.0",
-        "streamlit>=1.28.0",
-        "plotly>=5.0.0"
+        ("pandas", "pandas>=1.3.0"),
+        ("numpy", "numpy>=1.21.0"),
+        ("yaml", "pyyaml>=6.0"),
+        ("streamlit", "streamlit>=1.28.0"),
+        ("plotly", "plotly>=5.0.0")
     ]
 
-    for package in packages:
-        try:
-            pkg_name = package.split('>=')[0]
-            __import__(pkg_name)
-            print(f"  ✅ {pkg_name} 已安裝")
-        except ImportError:
-            print(f"  📥 安裝 {package}...")
-            subprocess.run([sys.executable, "-m", "pip", "install", package],
-                         capture_output=True)
+    missing = []
+    for module_name, package in packages:
+        if has_module(module_name):
+            print(f"  ✅ {package.split('>=')[0]} 已安裝")
+        else:
+            missing.append(package)
+
+    # 缺少的套件一次安裝，只啟動一次 pip
+    if missing:
+        print(f"  📥 安裝 {', '.join(missing)}...")
+        subprocess.run([sys.executable, "-m", "pip", "install", *missing],
+                     capture_output=True)
 
 def test_bloomberg_connection():
     """測試Bloomberg連線"""
@@ -110,13 +120,18 @@ def check_code_fix():
 
     fetcher_path = "src/qqq_options_fetcher.py"
     if os.path.exists(fetcher_path):
-        with open(fetcher_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        if "self.OPTION_FIELDS[:11]" in content:
+        # 直接掃描位元組，不需將整個檔案解碼成字串
+        with open(fetcher_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return True
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                has_fix = mm.find(b"self.OPTION_FIELDS[:11]") != -1
+                has_old = not has_fix and mm.find(b"self.OPTION_FIELDS[:6]") != -1
+
+        if has_fix:
             print("✅ Greeks 修復已套用 ([:11])")
             return True
-        elif "self.OPTION_FIELDS[:6]" in content:
+        elif has_old:
             print("❌ 發現舊版程式碼 ([:6])，需要更新")
             print("   請執行: git pull origin main")
             return False
@@ -8,21 +8,94 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.constituents_fetcher import ConstituentsFetcher
-from src.database_manager import DatabaseManager
 from datetime import datetime, timedelta
 import logging
 import argparse
-import pandas as pd
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    stream=sys.stdout
 )
 logger = logging.getLogger(__name__)
 
-
-def main():
+OUTPUT_DIR = Path('./data')
+
+
+def transform_and_validate(processor, options_data):
+    """Convert raw Bloomberg options data to the database format and validate it"""
+    transformed_data = processor.transform_bloomberg_data(options_data)
+    return processor.validate_data(transformed_data)
+
+
+def align_columns(frames):
+    """Reindex per-ticker frames to their column union, touching only frames that differ"""
+    columns = list(dict.fromkeys(c for frame in frames for c in frame.columns))
+    return [frame if list(frame.columns) == columns else frame.reindex(columns=columns)
+            for frame in frames]
+
+
+def combine_frames(frames):
+    """Stack per-ticker frames into one DataFrame"""
+    import pandas as pd
+
+    return pd.concat(align_columns(frames), ignore_index=True, sort=False)
+
+
+def export_frames(frames, filepath, export_format):
+    """
+    Write per-ticker frames to a single export file
+
+    Parquet and CSV are written one frame at a time, so no combined copy of
+    the data is built; Excel needs the whole sheet in memory and is combined.
+    """
+    if export_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Each column takes its type from the frames that actually have it; a
+        # ticker missing a column gets nulls of that type instead of NaN floats
+        try:
+            schema = pa.unify_schemas([pa.Schema.from_pandas(frame, preserve_index=False)
+                                       for frame in frames])
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            # Tickers disagree on a column's type; let pandas reconcile them in one frame
+            combine_frames(frames).to_parquet(filepath, index=False, compression='snappy')
+            return
+
+        def to_table(frame):
+            table = pa.Table.from_pandas(
+                frame, schema=pa.schema([schema.field(c) for c in frame.columns]),
+                preserve_index=False)
+            return pa.table([table.column(field.name) if field.name in frame.columns
+                             else pa.nulls(len(frame), field.type) for field in schema],
+                            schema=schema)
+
+        # Arrow releases the GIL while converting and encoding, so the next few
+        # frames are converted on worker threads while earlier ones are written;
+        # the window keeps only that many converted tables in memory
+        workers = min(4, len(frames))
+        pending = deque()
+        with pq.ParquetWriter(filepath, schema, compression='snappy') as writer, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            for frame in frames:
+                pending.append(pool.submit(to_table, frame))
+                if len(pending) > workers:
+                    writer.write_table(pending.popleft().result())
+            while pending:
+                writer.write_table(pending.popleft().result())
+    elif export_format == 'csv':
+        for i, frame in enumerate(align_columns(frames)):
+            frame.to_csv(filepath, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    elif export_format == 'excel':
+        combine_frames(frames).to_excel(filepath, index=False)
+
+
+def main(argv=None):
     """Main execution function for constituents fetch"""
 
     parser = argparse.ArgumentParser(description='Fetch individual stock options data')
@@ -45,22 +118,31 @@ def main():
     parser.add_argument('--no-export', action='store_true',
                        help='Skip file export, only save to database')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Validate arguments
     if not any([args.ticker, args.top, args.all]):
         parser.error("Must specify one of: --ticker, --top, or --all")
 
-    print("\n" + "="*60)
-    print("INDIVIDUAL STOCK OPTIONS FETCH")
+    # Deferred until the arguments are valid, so --help and usage errors don't
+    # pay for importing pandas and the Bloomberg/database layers
+    from src.constituents_fetcher import ConstituentsFetcher
+    from src.data_processor import DataProcessor
+    from src.database_manager import DatabaseManager
+
     if args.ticker:
-        print(f"Target: {args.ticker}")
+        target = args.ticker
     elif args.top:
-        print(f"Target: Top {args.top} constituents by weight")
+        target = f"Top {args.top} constituents by weight"
     else:
-        print("Target: All configured constituents")
-    print(f"History: {args.days} days")
-    print("="*60 + "\n")
+        target = "All configured constituents"
+    logger.info("\n".join([
+        "=" * 60,
+        "INDIVIDUAL STOCK OPTIONS FETCH",
+        f"Target: {target}",
+        f"History: {args.days} days",
+        "=" * 60,
+    ]))
 
     try:
         # Initialize fetcher
@@ -97,8 +179,7 @@ def main():
 
             if not options_data.empty:
                 # Transform data format
-                transformed_data = fetcher.processor.transform_bloomberg_data(options_data)
-                validated_data = fetcher.processor.validate_data(transformed_data)
+                validated_data = transform_and_validate(fetcher.processor, options_data)
 
                 results[args.ticker] = {
                     'equity_data': spot_data,
@@ -120,57 +201,84 @@ def main():
             else:
                 logger.info(f"Fetching all {len(constituents)} constituents")
 
-            for i, constituent in enumerate(constituents, 1):
-                ticker = constituent['ticker']
-                weight = constituent['weight']
-
-                logger.info(f"Processing {i}/{len(constituents)}: {ticker} (weight: {weight}%)")
-
+            # Spot prices for every constituent in one reference request
+            fetcher.fetch_constituent_equity_data_batch(
+                [constituent['ticker'] for constituent in constituents])
+
+            # Bloomberg requests share one session and stay serial; validation of the
+            # previous ticker runs on a worker while the next one is being fetched
+            request_delay = fetcher.config.get('limits', {}).get('request_delay', 1.0)
+            last_start = None
+            pending = {}
+
+            # The worker gets its own DataProcessor rather than sharing fetcher.processor
+            # with the main thread, which keeps using it inside the fetcher
+            worker_processor = DataProcessor()
+
+            with ThreadPoolExecutor(max_workers=1) as validator:
+                for i, constituent in enumerate(constituents, 1):
+                    ticker = constituent['ticker']
+                    weight = constituent['weight']
+
+                    # Space ticker starts by request_delay, counting time already spent fetching
+                    if last_start is not None:
+                        wait = request_delay - (time.monotonic() - last_start)
+                        if wait > 0:
+                            time.sleep(wait)
+                    last_start = time.monotonic()
+
+                    logger.info(f"Processing {i}/{len(constituents)}: {ticker} (weight: {weight}%)")
+
+                    try:
+                        # Get spot price (served from the batch via the fetcher's cache,
+                        # or a single request if the batch missed it)
+                        spot_data = fetcher.fetch_constituent_equity_data(ticker)
+                        spot_price = None
+                        if not spot_data.empty and 'PX_LAST' in spot_data.columns:
+                            spot_price = spot_data['PX_LAST'].iloc[0]
+                            logger.info(f"  {ticker} current price: ${spot_price:.2f}")
+
+                        # Fetch options
+                        options_data = fetcher.fetch_constituent_options(ticker, spot_price)
+
+                        if not options_data.empty:
+                            pending[ticker] = (spot_data,
+                                               validator.submit(transform_and_validate, worker_processor, options_data))
+                        else:
+                            logger.warning(f"  ⚠️ {ticker}: No options data found")
+
+                    except Exception as e:
+                        logger.error(f"  ❌ {ticker}: Error - {e}")
+                        continue
+
+            for ticker, (spot_data, future) in pending.items():
                 try:
-                    # Get spot price
-                    spot_data = fetcher.fetch_constituent_equity_data(ticker)
-                    spot_price = None
-                    if not spot_data.empty and 'PX_LAST' in spot_data.columns:
-                        spot_price = spot_data['PX_LAST'].iloc[0]
-                        logger.info(f"  {ticker} current price: ${spot_price:.2f}")
-
-                    # Fetch options
-                    options_data = fetcher.fetch_constituent_options(ticker, spot_price)
-
-                    if not options_data.empty:
-                        transformed_data = fetcher.processor.transform_bloomberg_data(options_data)
-                        validated_data = fetcher.processor.validate_data(transformed_data)
-
-                        results[ticker] = {
-                            'equity_data': spot_data,
-                            'options_data': validated_data,
-                            'records_count': len(validated_data)
-                        }
-
-                        logger.info(f"  ✅ {ticker}: {len(validated_data)} options records")
-                    else:
-                        logger.warning(f"  ⚠️ {ticker}: No options data found")
-
+                    validated_data = future.result()
                 except Exception as e:
                     logger.error(f"  ❌ {ticker}: Error - {e}")
                     continue
 
-                # Brief pause between requests
-                if i < len(constituents):
-                    import time
-                    time.sleep(1)
+                results[ticker] = {
+                    'equity_data': spot_data,
+                    'options_data': validated_data,
+                    'records_count': len(validated_data)
+                }
+
+                logger.info(f"  ✅ {ticker}: {len(validated_data)} options records")
 
         # Save results to database
         if args.save_db and results:
             logger.info("Saving to database...")
             db = DatabaseManager()
 
+            # One bulk insert for all tickers instead of one per ticker
+            options_frames = [data['options_data'] for data in results.values()
+                              if not data['options_data'].empty]
             total_saved = 0
-            for ticker, data in results.items():
-                if not data['options_data'].empty:
-                    saved = db.save_options_data(data['options_data'])
-                    total_saved += saved
+            if options_frames:
+                total_saved = db.save_options_data(combine_frames(options_frames))
 
+            for ticker, data in results.items():
                 if not data['equity_data'].empty:
                     db.save_equity_data(data['equity_data'])
 
@@ -187,8 +295,6 @@ def main():
                     all_options.append(data['options_data'])
 
             if all_options:
-                combined_data = pd.concat(all_options, ignore_index=True)
-
                 # Generate filename
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 if args.ticker:
@@ -198,38 +304,33 @@ def main():
                 else:
                     filename = f"all_constituents_{timestamp}"
 
-                output_dir = "./data/"
-                os.makedirs(output_dir, exist_ok=True)
+                OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-                if args.export_format == 'parquet':
-                    filepath = f"{output_dir}{filename}.parquet"
-                    combined_data.to_parquet(filepath, index=False)
-                elif args.export_format == 'csv':
-                    filepath = f"{output_dir}{filename}.csv"
-                    combined_data.to_csv(filepath, index=False)
-                elif args.export_format == 'excel':
-                    filepath = f"{output_dir}{filename}.xlsx"
-                    combined_data.to_excel(filepath, index=False)
+                extension = {'parquet': 'parquet', 'csv': 'csv', 'excel': 'xlsx'}[args.export_format]
+                filepath = OUTPUT_DIR / f"{filename}.{extension}"
+                export_frames(all_options, filepath, args.export_format)
 
                 logger.info(f"Exported to {filepath}")
 
         # Show summary
-        print("\n" + "="*70)
-        print("🎯 CONSTITUENTS FETCH SUMMARY")
-        print("="*70)
-
         total_records = sum(data['records_count'] for data in results.values())
         successful_tickers = len(results)
 
-        print(f"📊 Tickers Processed: {successful_tickers}")
-        print(f"✅ Total Options Records: {total_records:,}")
+        summary = [
+            "=" * 70,
+            "🎯 CONSTITUENTS FETCH SUMMARY",
+            "=" * 70,
+            f"📊 Tickers Processed: {successful_tickers}",
+            f"✅ Total Options Records: {total_records:,}",
+        ]
 
         if results:
-            print("\n📈 By Ticker:")
-            for ticker, data in results.items():
-                print(f"  {ticker}: {data['records_count']:,} records")
+            summary.append("\n📈 By Ticker:")
+            summary.extend(f"  {ticker}: {data['records_count']:,} records"
+                           for ticker, data in results.items())
 
-        print("="*70)
+        summary.append("=" * 70)
+        logger.info("\n".join(summary))
 
         # Show usage report
         fetcher.monitor.print_usage_report()
@@ -248,5 +349,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Progress and summary all go through the logger; flush per line when piped
+    sys.stdout.reconfigure(line_buffering=True)
     exit_code = main()
     sys.exit(exit_code)
\ No newline at end of file
@@ -8,18 +8,15 @@ Run this after market close (4:30 PM EST) to collect EOD Greeks
 import sys
 import os
 import time
-import schedule
+import atexit
 import logging
 from datetime import datetime, timedelta
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.eod_greeks_fetcher import EODGreeksFetcher
-from src.greeks_database import GreeksDatabase
-from src.usage_monitor import UsageMonitor
-
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -30,19 +27,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between backfill requests, to stay clear of rate limits
+BACKFILL_REQUEST_INTERVAL = 2
+
 
 class EODScheduler:
     """Scheduler for daily EOD Greeks collection"""
 
     def __init__(self):
         """Initialize scheduler"""
+        # Imported here rather than at module level so --help stays fast
+        from src.eod_greeks_fetcher import EODGreeksFetcher
+        from src.greeks_database import GreeksDatabase
+        from src.usage_monitor import UsageMonitor
+
         self.fetcher = EODGreeksFetcher()
         self.database = GreeksDatabase()
         self.monitor = UsageMonitor({})
+        self._session_open = False
 
         # Create logs directory
         os.makedirs('logs', exist_ok=True)
 
+    def _open_session(self):
+        """
+        Connect once for the long-running modes
+
+        Daily runs and backfill then reuse the session, since fetch_eod_greeks
+        only connects when needed; it is closed at interpreter exit.
+        """
+        if self._session_open:
+            return
+        if not self.fetcher.api.connect():
+            logger.warning("Bloomberg not reachable yet, will retry on first fetch")
+            return
+        self._session_open = True
+        atexit.register(self.fetcher.api.disconnect)
+
     def daily_eod_collection(self):
         """Execute daily EOD Greeks collection"""
         try:
@@ -96,35 +117,23 @@ class EODScheduler:
             logger.info("=" * 60)
 
     def _is_trading_day(self) -> bool:
-        """Check if today is a trading day"""
-        today = datetime.now()
+        """Check if today is a trading day (weekends and NYSE holidays excluded)"""
+        from src.trading_calendar import is_trading_day
 
-        # Skip weekends
-        if today.weekday() >= 5:
-            return False
-
-        # TODO: Add holiday calendar check
-        # For now, assume weekdays are trading days
-        return True
+        return is_trading_day(datetime.now())
 
     def _get_settle_date(self) -> str:
         """Get settlement date (previous business day)"""
+        from src.trading_calendar import is_trading_day, previous_trading_day
+
         today = datetime.now()
 
         # If running after market close, use today
-        if today.hour >= 16:
-            if today.weekday() < 5:
-                return today.strftime("%Y-%m-%d")
+        if today.hour >= 16 and is_trading_day(today):
+            return today.strftime("%Y-%m-%d")
 
         # Otherwise use previous business day
-        if today.weekday() == 0:  # Monday
-            settle = today - timedelta(days=3)
-        elif today.weekday() == 6:  # Sunday
-            settle = today - timedelta(days=2)
-        else:
-            settle = today - timedelta(days=1)
-
-        return settle.strftime("%Y-%m-%d")
+        return previous_trading_day(today).strftime("%Y-%m-%d")
 
     def _check_missing_dates(self, days_back: int = 30):
         """Check for missing dates and log them"""
@@ -154,27 +163,43 @@ class EODScheduler:
             return
 
         logger.info(f"Found {len(missing_dates)} missing dates to backfill")
+        self._open_session()
 
-        for date in missing_dates:
-            logger.info(f"Backfilling {date}...")
+        # Bloomberg requests share one session and stay serial, spaced by
+        # BACKFILL_REQUEST_INTERVAL; inserts for a fetched date run on a worker
+        # while the next date is being fetched
+        last_start = None
+        pending = {}
 
-            # Format date for Bloomberg (YYYYMMDD)
-            settle_date = date.replace("-", "")
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            for date in missing_dates:
+                if last_start is not None:
+                    wait = BACKFILL_REQUEST_INTERVAL - (time.monotonic() - last_start)
+                    if wait > 0:
+                        time.sleep(wait)
+                last_start = time.monotonic()
 
-            try:
-                # Fetch EOD Greeks for specific date
-                data = self.fetcher.fetch_eod_greeks("QQQ", settle_date)
+                logger.info(f"Backfilling {date}...")
+
+                # Format date for Bloomberg (YYYYMMDD)
+                settle_date = date.replace("-", "")
 
-                if not data.empty:
-                    # Save to database
-                    records = self.database.insert_eod_data(data, date)
-                    logger.info(f"  ✅ Inserted {records} records for {date}")
-                else:
-                    logger.warning(f"  ❌ No data available for {date}")
+                try:
+                    # Fetch EOD Greeks for specific date
+                    data = self.fetcher.fetch_eod_greeks("QQQ", settle_date)
 
-                # Add delay to avoid hitting rate limits
-                time.sleep(2)
+                    if not data.empty:
+                        # Save to database
+                        pending[date] = writer.submit(self.database.insert_eod_data, data, date)
+                    else:
+                        logger.warning(f"  ❌ No data available for {date}")
 
+                except Exception as e:
+                    logger.error(f"  ❌ Error backfilling {date}: {e}")
+
+        for date, future in pending.items():
+            try:
+                logger.info(f"  ✅ Inserted {future.result()} records for {date}")
             except Exception as e:
                 logger.error(f"  ❌ Error backfilling {date}: {e}")
 
@@ -187,7 +212,10 @@ class EODScheduler:
         Args:
             run_time: Time to run daily collection (HH:MM format)
         """
+        import schedule  # only needed in schedule mode
+
         logger.info(f"Scheduler started. Will run daily at {run_time} EST")
+        self._open_session()
 
         # Schedule daily job
         schedule.every().day.at(run_time).do(self.daily_eod_collection)
@@ -198,17 +226,21 @@ class EODScheduler:
             logger.info("Market is closed, running collection now...")
             self.daily_eod_collection()
 
-        # Keep running
+        # Keep running: sleep exactly until the next job is due
         while True:
+            idle = schedule.idle_seconds()
+            if idle is None:
+                break
+            if idle > 0:
+                time.sleep(idle)
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
 
     def run_once(self):
         """Run collection once and exit"""
         self.daily_eod_collection()
 
 
-def main():
+def main(argv=None):
     """Main entry point"""
     parser = argparse.ArgumentParser(description="EOD Greeks Scheduler")
     parser.add_argument(
@@ -229,7 +261,7 @@ def main():
         help="Number of days to backfill (default: 30)"
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     scheduler = EODScheduler()
 
@@ -243,6 +275,8 @@ def main():
         logger.info(f"Backfilling missing dates for past {args.days} days...")
         scheduler.backfill_missing_dates(args.days)
 
+    return 0
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Unified Fetch Script
+Run any of the fetch scripts as a subcommand of one process
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import importlib
+
+# Subcommand -> (module whose main(argv) runs it, help text)
+COMMANDS = {
+    'historical': ('scripts.historical_fetch', 'Fetch historical QQQ options data'),
+    'constituents': ('scripts.constituents_fetch', 'Fetch individual stock options data'),
+    'eod': ('scripts.eod_greeks_scheduler', 'Collect, schedule or backfill EOD Greeks'),
+}
+
+
+def main(argv=None):
+    """Dispatch to the selected script's main() in this process"""
+    parser = argparse.ArgumentParser(
+        description='Bloomberg fetch scripts',
+        epilog="\n".join(f"  {name:<13} {text}" for name, (_, text) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('command', choices=COMMANDS,
+                       help='Script to run; use "<command> --help" for its options')
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                       help='Arguments passed through to the script')
+    args = parser.parse_args(argv)
+
+    # Only the selected script (and its pandas/Bloomberg imports) is loaded
+    module = importlib.import_module(COMMANDS[args.command][0])
+    return module.main(args.args)
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
@@ -8,21 +8,33 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.qqq_options_fetcher import QQQOptionsFetcher
-from src.database_manager import DatabaseManager
 from datetime import datetime, timedelta
 import logging
 import argparse
-import pandas as pd
 
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    stream=sys.stdout
 )
 logger = logging.getLogger(__name__)
 
+# Historical chains are large and mostly floats: zstd with byte-stream-split
+# encoding gives much smaller files than the default snappy at similar read speed
+HISTORICAL_PARQUET_OPTIONS = {
+    'compression': 'zstd',
+    'compression_level': 5,
+    'row_group_size': 128 * 1024,
+    'data_page_size': 1 << 20,
+    'byte_stream_split': True,
+    'sort_by': ['expiry', 'strike'],
+}
 
-def main():
+# Columns shown in the suggested read_parquet call
+LOAD_HINT_COLUMNS = ['fetch_date', 'expiry', 'strike', 'option_type', 'last', 'delta']
+
+
+def main(argv=None):
     """Main execution function for historical fetch"""
     
     parser = argparse.ArgumentParser(description='Fetch historical QQQ options data')
@@ -44,11 +56,22 @@ def main():
                        help='Fetch only at-the-money strikes (faster)')
     parser.add_argument('--no-export', action='store_true',
                        help='Skip file export, only save to database')
-    args = parser.parse_args()
+    parser.add_argument('--force', action='store_true',
+                       help='Continue even if the estimated usage would exceed API limits')
+    parser.add_argument('--max-usage', type=int,
+                       help='Abort if the estimated API usage exceeds this many data points')
+    args = parser.parse_args(argv)
+
+    # Deferred until the arguments are parsed, so --help and usage errors don't
+    # pay for importing pandas and the Bloomberg/database layers
+    import numpy as np
+    import pandas as pd
+    from src.qqq_options_fetcher import QQQOptionsFetcher
+    from src.database_manager import DatabaseManager
     
     # Handle quick test mode
     if args.quick_test:
-        print("🧪 Quick test mode enabled - fetching 1 week of data with limited strikes")
+        logger.info("🧪 Quick test mode enabled - fetching 1 week of data with limited strikes")
         args.days = 7
         args.atm_only = True
         if not args.export_format:
@@ -68,10 +91,12 @@ def main():
         end_date = datetime.now().strftime('%Y%m%d')
         start_date = (datetime.now() - timedelta(days=args.days)).strftime('%Y%m%d')
     
-    print("\n" + "="*60)
-    print("QQQ OPTIONS HISTORICAL FETCH")
-    print(f"Date Range: {start_date} to {end_date}")
-    print("="*60 + "\n")
+    logger.info("\n".join([
+        "=" * 60,
+        "QQQ OPTIONS HISTORICAL FETCH",
+        f"Date Range: {start_date} to {end_date}",
+        "=" * 60,
+    ]))
     
     try:
         # Initialize fetcher
@@ -94,11 +119,16 @@ def main():
         estimated_usage = args.days * 40 * 10  # days * options * fields
         logger.info(f"Estimated API usage: {estimated_usage:,} data points")
         
+        if args.max_usage is not None and estimated_usage > args.max_usage:
+            logger.error(f"Estimated usage exceeds --max-usage ({args.max_usage:,})")
+            return 1
+
+        # Decided by flags rather than a prompt, so cron and dashboard runs never block
         if not fetcher.monitor.can_make_request(estimated_usage):
-            logger.warning("Request would exceed API limits!")
-            response = input("Continue with reduced scope? (y/n): ")
-            if response.lower() != 'y':
+            if not args.force:
+                logger.error("Request would exceed API limits! Re-run with --force to continue anyway")
                 return 1
+            logger.warning("Request would exceed API limits, continuing because of --force")
         
         # Fetch historical data with options
         logger.info("Fetching historical options data...")
@@ -108,24 +138,29 @@ def main():
             logger.info("ATM-only mode: limiting to 5 strikes around current price")
             # This will be handled in the fetch_historical_options method
 
-        data = fetcher.fetch_historical_options(start_date, end_date)
+        # Transform and validate one expiry at a time, so the raw wide-format
+        # frames for every expiry never have to be held (or concatenated) at once
+        validated_chunks = []
+        records_fetched = 0
+        for data in fetcher.iter_historical_options(start_date, end_date):
+            records_fetched += len(data)
+            transformed_data = fetcher.processor.transform_bloomberg_data(data)
+            validated = fetcher.processor.validate_data(transformed_data)
+            if not validated.empty:
+                validated_chunks.append(validated)
+            del data, transformed_data
 
-        if data.empty:
+        if records_fetched == 0:
             logger.warning("No data fetched")
             return 1
 
-        logger.info(f"Fetched {len(data)} historical records")
+        logger.info(f"Fetched {records_fetched} historical records")
 
-        # Transform Bloomberg data format to standardized format
-        if not data.empty:
-            logger.info("Transforming Bloomberg data format...")
-            transformed_data = fetcher.processor.transform_bloomberg_data(data)
-            logger.info(f"Transformed data to {len(transformed_data)} records")
+        if validated_chunks:
+            processed_data = pd.concat(validated_chunks, ignore_index=True, sort=False)
         else:
-            transformed_data = data
-
-        # Validate processed data
-        processed_data = fetcher.processor.validate_data(transformed_data)
+            processed_data = pd.DataFrame()
+        del validated_chunks
         logger.info(f"Validated {len(processed_data)} records")
 
         # Generate data quality report
@@ -149,34 +184,43 @@ def main():
 
         # Export to file unless --no-export is specified
         if not args.no_export:
-            # Temporarily set the output format in config
-            original_format = fetcher.config.get('output', {}).get('format', 'csv')
-            if 'output' not in fetcher.config:
-                fetcher.config['output'] = {}
-            fetcher.config['output']['format'] = args.export_format
+            # Temporarily set the output format (and parquet settings) in config
+            original_output = fetcher.config.get('output', {})
+            fetcher.config['output'] = {**original_output, 'format': args.export_format,
+                                        **HISTORICAL_PARQUET_OPTIONS}
 
             # Export with intelligent naming
             filepath = fetcher.save_data(processed_data, suffix="_historical")
             logger.info(f"Exported to {filepath}")
 
-            # Restore original format
-            fetcher.config['output']['format'] = original_format
+            # Restore original output config
+            fetcher.config['output'] = original_output
         else:
             logger.info("Skipping file export as requested")
             filepath = None
         
+        # Expiry repeats a handful of values on every row; the sorted categories of
+        # an ordered categorical copy give the distinct count and min/max for the
+        # summary, while the saved and exported data keep their original dtypes
+        if 'expiry' in processed_data.columns:
+            expiries = processed_data['expiry'].astype(pd.CategoricalDtype(ordered=True)).cat.categories
+        else:
+            expiries = None
+
         # Show enhanced summary
-        print("\n" + "="*70)
-        print("🎯 HISTORICAL FETCH SUMMARY")
-        print("="*70)
+        summary = [
+            "=" * 70,
+            "🎯 HISTORICAL FETCH SUMMARY",
+            "=" * 70,
+        ]
 
         # Format dates for display
         start_display = datetime.strptime(start_date, '%Y%m%d').strftime('%Y-%m-%d')
         end_display = datetime.strptime(end_date, '%Y%m%d').strftime('%Y-%m-%d')
 
-        print(f"📅 Date Range: {start_display} to {end_display}")
-        print(f"📊 Records Fetched: {len(data):,}")
-        print(f"✅ Records Validated: {len(processed_data):,}")
+        summary.append(f"📅 Date Range: {start_display} to {end_display}")
+        summary.append(f"📊 Records Fetched: {records_fetched:,}")
+        summary.append(f"✅ Records Validated: {len(processed_data):,}")
 
         if not processed_data.empty:
             if 'fetch_date' in processed_data.columns:
@@ -185,41 +229,56 @@ def main():
                     valid_dates = processed_data['fetch_date'].dropna()
                     valid_dates = valid_dates[valid_dates != '']
                     if len(valid_dates) > 0:
-                        unique_days = pd.to_datetime(valid_dates, errors='coerce').dt.date.nunique()
-                        print(f"📈 Unique Trading Days: {unique_days}")
+                        # Day-resolution datetime64 values; no Python date objects are built
+                        days = pd.to_datetime(valid_dates, errors='coerce').to_numpy('datetime64[D]')
+                        unique_days = np.unique(days[~np.isnat(days)]).size
+                        summary.append(f"📈 Unique Trading Days: {unique_days}")
                     else:
-                        print(f"📈 Unique Trading Days: 0 (no valid dates)")
+                        summary.append(f"📈 Unique Trading Days: 0 (no valid dates)")
                 except Exception as e:
-                    print(f"📈 Unique Trading Days: N/A (date parsing error)")
+                    summary.append(f"📈 Unique Trading Days: N/A (date parsing error)")
+            else:
+                summary.append(f"📈 Unique Trading Days: N/A (fetch_date not available)")
+            # One sorted-unique pass gives the strike count, min and max together
+            strikes = processed_data['strike'].to_numpy(dtype=float)
+            unique_strikes = np.unique(strikes[~np.isnan(strikes)])
+            summary.append(f"🎯 Unique Strikes: {unique_strikes.size}")
+            if expiries is not None:
+                summary.append(f"📅 Unique Expiries: {len(expiries)}")
             else:
-                print(f"📈 Unique Trading Days: N/A (fetch_date not available)")
-            print(f"🎯 Unique Strikes: {processed_data['strike'].nunique()}")
-            print(f"📅 Unique Expiries: {processed_data['expiry'].nunique()}")
+                summary.append(f"📅 Unique Expiries: N/A (expiry not available)")
 
             # Show data range
-            min_strike = processed_data['strike'].min()
-            max_strike = processed_data['strike'].max()
-            print(f"💰 Strike Range: ${min_strike:.0f} - ${max_strike:.0f}")
+            if unique_strikes.size:
+                summary.append(f"💰 Strike Range: ${unique_strikes[0]:.0f} - ${unique_strikes[-1]:.0f}")
 
             # Show expiry range
-            expiries = processed_data['expiry'].unique()
-            if len(expiries) > 0:
-                print(f"⏰ Expiry Range: {min(expiries)} to {max(expiries)}")
+            if expiries is not None and len(expiries) > 0:
+                summary.append(f"⏰ Expiry Range: {expiries[0]} to {expiries[-1]}")
 
         if filepath:
             import os
             file_size = os.path.getsize(filepath) / (1024 * 1024)  # MB
-            print(f"💾 Export File: {filepath}")
-            print(f"📁 File Size: {file_size:.1f} MB")
-            print(f"📝 Format: {args.export_format.upper()}")
+            summary.append(f"💾 Export File: {filepath}")
+            summary.append(f"📁 File Size: {file_size:.1f} MB")
+            summary.append(f"📝 Format: {args.export_format.upper()}")
 
             # Loading instructions
             if args.export_format == 'parquet':
-                print(f"💡 Load with: df = pd.read_parquet('{filepath}')")
+                # Suggest column pruning and row-group filtering rather than a full load
+                hint_columns = [c for c in LOAD_HINT_COLUMNS if c in processed_data.columns]
+                summary.append(f"💡 Load with: df = pd.read_parquet('{filepath}',")
+                summary.append(f"       columns={hint_columns},")
+                if expiries is not None and len(expiries) > 0:
+                    summary.append(f"       filters=[('expiry', '==', '{expiries[0]}'), "
+                                   f"('option_type', '==', 'C')])")
+                else:
+                    summary.append(f"       filters=[('option_type', '==', 'C')])")
             elif args.export_format == 'csv':
-                print(f"💡 Load with: df = pd.read_csv('{filepath}')")
+                summary.append(f"💡 Load with: df = pd.read_csv('{filepath}')")
 
-        print("="*70)
+        summary.append("=" * 70)
+        logger.info("\n".join(summary))
         
         # Show usage report
         fetcher.monitor.print_usage_report()
@@ -9,13 +9,27 @@ import sys
 import subprocess
 import platform
 import shutil
+import site
 from pathlib import Path
 
 class BloombergSetup:
-    def __init__(self):
+    MIN_PIP_VERSION = (23, 2)
+
+    # Common Bloomberg installation paths
+    BLOOMBERG_DAPI_DIRS = (
+        r"C:\blp\DAPI",
+        r"C:\Program Files (x86)\blp\DAPI",
+        r"C:\Program Files\Bloomberg\blp\DAPI",
+    )
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
         self.current_dir = Path.cwd()
         self.python_dir = Path(sys.executable).parent
         self.is_windows = platform.system() == 'Windows'
+        self.scripts_dir = self.python_dir / "Scripts"
+        self.user_site = Path(site.getusersitepackages()) if hasattr(site, 'getusersitepackages') else None
+        self.dll_directory = None
 
     def print_header(self, message):
         """Print formatted header"""
@@ -44,6 +58,34 @@ class BloombergSetup:
 
         return True
 
+    def _pip(self, *args, env=None):
+        """Run pip quietly; its output is only shown on failure (or with --verbose)"""
+        result = subprocess.run([sys.executable, "-m", "pip", *args], env=env,
+                                capture_output=not self.verbose, text=True)
+        if result.returncode:
+            if not self.verbose:
+                for output in (result.stdout, result.stderr):
+                    if output:
+                        print(output.rstrip())
+            raise subprocess.CalledProcessError(result.returncode, result.args)
+
+    def pip_version(self):
+        """Installed pip version as a (major, minor) tuple, (0, 0) if unknown"""
+        try:
+            from importlib.metadata import version
+            return tuple(int(x) for x in version('pip').split('.')[:2])
+        except Exception:
+            return (0, 0)
+
+    def is_installed(self, package):
+        """Check for an installed distribution without spawning pip"""
+        from importlib.metadata import PackageNotFoundError, distribution
+        try:
+            distribution(package)
+            return True
+        except PackageNotFoundError:
+            return False
+
     def install_requirements(self):
         """Install all Python dependencies"""
         self.print_header("Installing Python Dependencies")
@@ -53,14 +95,21 @@ class BloombergSetup:
             print("❌ ERROR: requirements.txt not found")
             return False
 
+        # Skip pip's own index/version lookups and never block on a prompt
+        pip_env = {**os.environ, 'PIP_DISABLE_PIP_VERSION_CHECK': '1', 'PIP_NO_INPUT': '1'}
+
         try:
-            # Upgrade pip first
-            print("📦 Upgrading pip...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
+            # Upgrade pip first, unless it is already recent enough
+            if self.pip_version() >= self.MIN_PIP_VERSION:
+                print("✅ pip is up to date, skipping upgrade")
+            else:
+                print("📦 Upgrading pip...")
+                self._pip("install", "--upgrade", "pip", env=pip_env)
 
             # Install requirements
             print("📦 Installing dependencies...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt", "--user"])
+            self._pip("install", "-r", "requirements.txt", "--user",
+                      "--no-warn-script-location", env=pip_env)
             print("✅ Dependencies installed successfully")
             return True
         except subprocess.CalledProcessError as e:
@@ -76,17 +125,14 @@ class BloombergSetup:
 
         try:
             # Uninstall old version if exists
-            print("🔧 Removing old blpapi if exists...")
-            subprocess.run([sys.executable, "-m", "pip", "uninstall", "blpapi", "-y"],
-                         capture_output=True)
+            if self.is_installed("blpapi"):
+                print("🔧 Removing old blpapi...")
+                subprocess.run([sys.executable, "-m", "pip", "uninstall", "blpapi", "-y"],
+                             capture_output=True)
 
             # Install from official repository
             print("📦 Installing blpapi from Bloomberg's official repository...")
-            subprocess.check_call([
-                sys.executable, "-m", "pip", "install",
-                "--index-url", bloomberg_index,
-                "blpapi", "--user"
-            ])
+            self._pip("install", "--index-url", bloomberg_index, "blpapi", "--user")
             print("✅ Bloomberg API installed successfully from official repository!")
             return True
 
@@ -95,15 +141,19 @@ class BloombergSetup:
             print("   Falling back to local wheel method...")
             return False
 
+    def _find_wheels(self, directory):
+        """Find blpapi wheel files with a single directory scan (no per-entry stat)"""
+        with os.scandir(directory) as entries:
+            return [e for e in entries
+                    if e.name.startswith("blpapi") and e.name.endswith(".whl")]
+
     def install_blpapi_wheel(self):
         """Install Bloomberg Python API from local wheel file (fallback method)"""
         self.print_header("Installing Bloomberg API (Local Wheel Method)")
 
         # Check if blpapi wheel exists
-        wheel_file = None
-        for file in self.current_dir.glob("blpapi*.whl"):
-            wheel_file = file
-            break
+        wheels = self._find_wheels(self.current_dir)
+        wheel_file = wheels[0] if wheels else None
 
         if not wheel_file:
             print("❌ ERROR: blpapi wheel file not found")
@@ -117,13 +167,23 @@ class BloombergSetup:
         try:
             # Install wheel
             print(f"📦 Installing {wheel_file.name}...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", str(wheel_file), "--user", "--force-reinstall"])
+            self._pip("install", wheel_file.path, "--user", "--force-reinstall")
             print("✅ blpapi installed successfully from wheel")
             return True
         except subprocess.CalledProcessError as e:
             print(f"❌ ERROR installing blpapi: {e}")
             return False
 
+    def _install_dll(self, src, dst):
+        """Hard-link the DLL into place, falling back to a copy across volumes"""
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            if not os.path.samefile(src, dst):
+                shutil.copy2(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
     def setup_dll(self):
         """Setup Bloomberg DLL file with multiple fallback methods"""
         self.print_header("Setting up Bloomberg DLL")
@@ -146,19 +206,18 @@ class BloombergSetup:
         python_dll = self.python_dir / "blpapi3_64.dll"
         try:
             print(f"📋 Method 1: Copying to Python directory: {self.python_dir}")
-            shutil.copy2(dll_file, python_dll)
+            self._install_dll(dll_file, python_dll)
             print("✅ DLL copied to Python directory")
             success_count += 1
         except Exception as e:
             print(f"⚠️  Method 1 failed: {e}")
 
         # Method 2: Copy to Scripts directory
-        scripts_dir = self.python_dir / "Scripts"
-        if scripts_dir.exists():
+        if self.scripts_dir.exists():
             try:
-                scripts_dll = scripts_dir / "blpapi3_64.dll"
-                print(f"📋 Method 2: Copying to Scripts directory: {scripts_dir}")
-                shutil.copy2(dll_file, scripts_dll)
+                scripts_dll = self.scripts_dir / "blpapi3_64.dll"
+                print(f"📋 Method 2: Copying to Scripts directory: {self.scripts_dir}")
+                self._install_dll(dll_file, scripts_dll)
                 print("✅ DLL copied to Scripts directory")
                 success_count += 1
             except Exception as e:
@@ -166,12 +225,11 @@ class BloombergSetup:
 
         # Method 3: Copy to site-packages directory
         try:
-            import site
-            site_packages = Path(site.getusersitepackages()) if hasattr(site, 'getusersitepackages') else None
+            site_packages = self.user_site
             if site_packages and site_packages.exists():
                 site_dll = site_packages / "blpapi3_64.dll"
                 print(f"📋 Method 3: Copying to site-packages: {site_packages}")
-                shutil.copy2(dll_file, site_dll)
+                self._install_dll(dll_file, site_dll)
                 print("✅ DLL copied to site-packages directory")
                 success_count += 1
         except Exception as e:
@@ -185,7 +243,7 @@ class BloombergSetup:
                 if system32.exists():
                     system32_dll = system32 / "blpapi3_64.dll"
                     print(f"📋 Method 4: Copying to System32: {system32}")
-                    shutil.copy2(dll_file, system32_dll)
+                    self._install_dll(dll_file, system32_dll)
                     print("✅ DLL copied to System32 directory")
                     success_count += 1
             except Exception as e:
@@ -196,19 +254,12 @@ class BloombergSetup:
         print(f"✅ Added {self.current_dir} to PATH")
 
         # Method 6: Check common Bloomberg installation paths
-        bloomberg_paths = [
-            "C:\\blp\\DAPI",
-            "C:\\Program Files (x86)\\blp\\DAPI",
-            "C:\\Program Files\\Bloomberg\\blp\\DAPI"
-        ]
-
-        for bloomberg_path in bloomberg_paths:
+        for bloomberg_path in self.BLOOMBERG_DAPI_DIRS:
             try:
-                path_obj = Path(bloomberg_path)
-                if path_obj.exists():
-                    bloomberg_dll = path_obj / "blpapi3_64.dll"
+                if os.path.isdir(bloomberg_path):
+                    bloomberg_dll = os.path.join(bloomberg_path, "blpapi3_64.dll")
                     print(f"📋 Method 6: Copying to Bloomberg path: {bloomberg_path}")
-                    shutil.copy2(dll_file, bloomberg_dll)
+                    self._install_dll(dll_file, bloomberg_dll)
                     print(f"✅ DLL copied to Bloomberg directory: {bloomberg_path}")
                     success_count += 1
                     # Add to PATH too
@@ -299,8 +350,9 @@ if "%choice%"=="1" (
 pause
 """
 
+        # Both scripts are Windows-only: write CRLF bytes directly on every platform
         batch_file = self.current_dir / "run_bloomberg_fetcher.bat"
-        batch_file.write_text(batch_content)
+        batch_file.write_bytes(batch_content.replace("\n", "\r\n").encode('ascii'))
         print(f"✅ Created: {batch_file.name}")
 
         # PowerShell script
@@ -330,7 +382,7 @@ Write-Host ""
 """
 
         ps1_file = self.current_dir / "run_bloomberg_fetcher.ps1"
-        ps1_file.write_text(ps1_content, encoding='utf-8')
+        ps1_file.write_bytes(ps1_content.replace("\n", "\r\n").encode('utf-8'))
         print(f"✅ Created: {ps1_file.name}")
 
         return True
@@ -349,6 +401,15 @@ Write-Host ""
             os.environ['PATH'] = str(self.current_dir) + os.pathsep + current_path
             print(f"✅ Added {self.current_dir} to PATH")
 
+        # Python 3.8+ on Windows ignores PATH when loading extension DLLs;
+        # PATH above is still used by subprocesses
+        if self.is_windows and sys.version_info >= (3, 8):
+            try:
+                self.dll_directory = os.add_dll_directory(str(self.current_dir))
+                print(f"✅ Registered {self.current_dir} as a DLL directory")
+            except OSError as e:
+                print(f"⚠️  Could not register DLL directory: {e}")
+
         return True
 
     def run(self):
@@ -422,7 +483,7 @@ Note: Use API<GO> in Bloomberg Terminal (not WAPI<GO>)
         return True
 
 if __name__ == "__main__":
-    setup = BloombergSetup()
+    setup = BloombergSetup(verbose='--verbose' in sys.argv)
     success = setup.run()
 
     if not success:
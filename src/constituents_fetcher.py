@@ -66,6 +66,9 @@ class ConstituentsFetcher:
         self.max_retries = self.error_config.get('max_retries', 3)
         self.retry_delay = self.error_config.get('retry_delay', 5)
         
+        # Equity snapshots already fetched in this process, keyed by (ticker, date)
+        self._equity_cache: Dict[Tuple[str, str], pd.DataFrame] = {}
+        
     def _load_config(self, config_path: str) -> Dict:
         """Load main configuration"""
         if os.path.exists(config_path):
@@ -107,6 +110,12 @@ class ConstituentsFetcher:
         Returns:
             DataFrame with equity data
         """
+        cache_key = (ticker, datetime.now().strftime('%Y%m%d'))
+        cached = self._equity_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Using cached equity data for {ticker}")
+            return cached.copy()
+        
         try:
             bloomberg_ticker = f"{ticker} US Equity"
             
@@ -132,6 +141,7 @@ class ConstituentsFetcher:
                 # Update usage monitor
                 self.monitor.record_usage(estimated_usage)
                 
+                self._equity_cache[cache_key] = data.copy()
                 logger.info(f"Successfully fetched equity data for {ticker}")
                 return data
             
@@ -140,6 +150,50 @@ class ConstituentsFetcher:
             
         return pd.DataFrame()
     
+    def fetch_constituent_equity_data_batch(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Fetch equity data for several constituents in a single reference request
+        
+        Args:
+            tickers: Stock ticker symbols
+            
+        Returns:
+            DataFrame with one row per ticker that returned data
+        """
+        try:
+            bloomberg_tickers = [f"{ticker} US Equity" for ticker in tickers]
+            
+            logger.info(f"Fetching equity data for {len(tickers)} tickers in one request")
+            
+            # Check API usage
+            estimated_usage = len(self.equity_fields) * len(tickers)
+            if not self.monitor.can_make_request(estimated_usage):
+                logger.warning("API limit would be exceeded for batched equity data")
+                return pd.DataFrame()
+            
+            data = self.api.fetch_reference_data(bloomberg_tickers, self.equity_fields)
+            
+            if not data.empty:
+                data['underlying'] = data['ticker'].str.replace(' US Equity', '', regex=False)
+                data['data_type'] = 'equity'
+                data['fetch_time'] = datetime.now()
+                
+                # Update usage monitor
+                self.monitor.record_usage(len(data) * len(self.equity_fields))
+                
+                # Later single-ticker lookups (e.g. from fetch_constituent_options) hit the cache
+                today = datetime.now().strftime('%Y%m%d')
+                for ticker, frame in data.groupby('underlying'):
+                    self._equity_cache[(ticker, today)] = frame.reset_index(drop=True)
+                
+                logger.info(f"Successfully fetched equity data for {len(data)}/{len(tickers)} tickers")
+                return data
+            
+        except Exception as e:
+            logger.error(f"Error fetching batched equity data: {e}")
+        
+        return pd.DataFrame()
+    
     def fetch_constituent_options(self, 
                                  ticker: str,
                                  spot_price: Optional[float] = None) -> pd.DataFrame:
@@ -82,7 +82,10 @@ class DataProcessor:
 
                 ticker_groups[ticker_part][field_part] = col
 
-        # Process each ticker group
+        # Dates are formatted once for the whole index, not once per record
+        fetch_dates = self._format_fetch_dates(df.index)
+
+        # Process each ticker group column-wise: one row per date with any data
         for ticker_key, fields in ticker_groups.items():
             # Parse ticker information
             ticker_info = self._parse_bloomberg_ticker(ticker_key)
@@ -90,54 +93,61 @@ class DataProcessor:
             if not ticker_info:
                 continue
 
-            # Get all dates that have data for this ticker
-            dates_with_data = set()
+            block = df[list(fields.values())]
+            has_data = block.notna().any(axis=1).to_numpy()
+            if not has_data.any():
+                continue
+            block = block[has_data]
+
+            columns = {key: [value] * len(block) for key, value in ticker_info.items()}
+            columns['fetch_date'] = fetch_dates[has_data]
+
+            # Map Bloomberg fields to standard fields; when two fields share a
+            # standard name (PX_VOLUME/VOLUME) the later non-null value wins
             for field_name, col_name in fields.items():
-                if col_name in df.columns:
-                    dates_with_data.update(df[col_name].dropna().index)
-
-            # Create records for each date
-            for date in dates_with_data:
-                record = ticker_info.copy()
-                # Ensure proper date formatting
-                try:
-                    if isinstance(date, str):
-                        # If it's already a string, try to parse it
-                        parsed_date = pd.to_datetime(date)
-                        record['fetch_date'] = parsed_date.strftime('%Y-%m-%d')
-                    elif hasattr(date, 'strftime'):
-                        # If it's a datetime object
-                        record['fetch_date'] = date.strftime('%Y-%m-%d')
-                    else:
-                        # If it's something else (like int index), convert to datetime
-                        parsed_date = pd.to_datetime(date)
-                        record['fetch_date'] = parsed_date.strftime('%Y-%m-%d')
-                except Exception:
-                    # Fallback: use current date with offset
-                    from datetime import datetime, timedelta
-                    fallback_date = datetime.now() - timedelta(days=int(str(date)) if str(date).isdigit() else 0)
-                    record['fetch_date'] = fallback_date.strftime('%Y-%m-%d')
-
-                # Add field data
-                for field_name, col_name in fields.items():
-                    if col_name in df.columns and date in df.index:
-                        value = df.loc[date, col_name]
-                        if pd.notna(value):
-                            # Map Bloomberg field to standard field
-                            standard_field = self.bloomberg_field_mappings.get(field_name, field_name.lower())
-                            record[standard_field] = value
-
-                transformed_data.append(record)
+                standard_field = self.bloomberg_field_mappings.get(field_name, field_name.lower())
+                values = block[col_name].to_numpy()
+                if standard_field in columns:
+                    values = np.where(pd.notna(values), values, columns[standard_field])
+                columns[standard_field] = values
+
+            # Built in one constructor call so each frame has consolidated blocks
+            records = pd.DataFrame(columns)
+            transformed_data.append(records)
 
         if not transformed_data:
             logger.warning("No data could be transformed")
             return pd.DataFrame()
 
-        result_df = pd.DataFrame(transformed_data)
+        result_df = pd.concat(transformed_data, ignore_index=True, sort=False)
         logger.info(f"Transformed {len(result_df)} records from Bloomberg format")
 
         return result_df
 
+    def _format_fetch_dates(self, index: pd.Index) -> np.ndarray:
+        """Format a Bloomberg date index as 'YYYY-MM-DD' strings"""
+        if isinstance(index, pd.DatetimeIndex):
+            return np.asarray(index.strftime('%Y-%m-%d'), dtype=object)
+        return np.array([self._format_fetch_date(date) for date in index], dtype=object)
+
+    def _format_fetch_date(self, date) -> str:
+        """Format a single index value as 'YYYY-MM-DD'"""
+        try:
+            if isinstance(date, str):
+                # If it's already a string, try to parse it
+                return pd.to_datetime(date).strftime('%Y-%m-%d')
+            elif hasattr(date, 'strftime'):
+                # If it's a datetime object
+                return date.strftime('%Y-%m-%d')
+            else:
+                # If it's something else (like int index), convert to datetime
+                return pd.to_datetime(date).strftime('%Y-%m-%d')
+        except Exception:
+            # Fallback: use current date with offset
+            from datetime import timedelta
+            fallback_date = datetime.now() - timedelta(days=int(str(date)) if str(date).isdigit() else 0)
+            return fallback_date.strftime('%Y-%m-%d')
+
     def _parse_bloomberg_ticker(self, ticker_key: str) -> Optional[Dict]:
         """
         Parse Bloomberg ticker to extract option information
@@ -214,6 +224,10 @@ class DataProcessor:
         df = self._clean_prices(df)
         df = self._calculate_derived_fields(df)
         df = self._remove_invalid_records(df)
+
+        # The derived-field inserts leave one block per added column; consolidate
+        # once here so writers and summary stats downstream scan contiguous arrays
+        df = df.copy()
         
         logger.info(f"Validated {len(df)} records")
         return df
@@ -5,15 +5,50 @@ Handles SQLite database operations
 """
 
 import sqlite3
+import csv
 import pandas as pd
 from datetime import datetime
 import os
 import logging
+import threading
 from typing import Optional, List, Dict
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Dashboard read queries. Kept as constants so the identical SQL text hits
+# sqlite3's prepared-statement cache on the shared read connection.
+SQL_STATS = """
+    SELECT COUNT(*), COUNT(DISTINCT fetch_date),
+           MAX(timestamp), COUNT(DISTINCT underlying)
+    FROM options_data
+"""
+
+SQL_PREVIEW = """
+    SELECT underlying, strike, expiry, option_type,
+           last, bid, ask, volume, open_interest, fetch_date
+    FROM options_data
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+# Exports stream rows from SQLite in batches of this many rows
+EXPORT_CHUNK_ROWS = 10_000
+
+# Bound parameters per INSERT statement; SQLite builds before 3.32 cap this at 999
+SQLITE_MAX_VARIABLES = 999
+
+# Columns written to Parquet as timestamps rather than strings
+PARQUET_DATE_COLUMNS = ('fetch_date', 'timestamp', 'expiry')
+
+SQL_AVG_BY_TICKER = """
+    SELECT underlying, AVG(last) AS avg_px_last
+    FROM options_data
+    WHERE last IS NOT NULL
+    GROUP BY underlying
+    ORDER BY underlying
+"""
+
 
 class DatabaseManager:
     """Manage SQLite database for options data"""
@@ -26,6 +61,8 @@ class DatabaseManager:
             db_path: Path to SQLite database file
         """
         self.db_path = db_path
+        self._read_conn = None
+        self._read_lock = threading.Lock()
         self._ensure_directory()
         self._init_database()
     
@@ -35,10 +72,34 @@ class DatabaseManager:
         if db_dir:
             os.makedirs(db_dir, exist_ok=True)
     
+    def _get_connection(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection pragmas applied"""
+        conn = sqlite3.connect(self.db_path)
+        # WAL (set once in _init_database) makes NORMAL safe and much cheaper than FULL
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """
+        Get the long-lived autocommit connection used for repeated reads
+
+        Callers must hold self._read_lock, since the connection is shared
+        between threads.
+        """
+        if self._read_conn is None:
+            self._read_conn = sqlite3.connect(
+                self.db_path, isolation_level=None, check_same_thread=False
+            )
+            self._read_conn.execute("PRAGMA cache_size = -64000")  # 64 MB page cache
+        return self._read_conn
+
     def _init_database(self):
         """Initialize database with required tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         cursor = conn.cursor()
+
+        # WAL lets the dashboard read while a fetch script is writing
+        cursor.execute("PRAGMA journal_mode=WAL")
         
         # Create options data table with OPEN_INT explicitly included
         cursor.execute("""
@@ -83,6 +144,12 @@ class DatabaseManager:
             CREATE INDEX IF NOT EXISTS idx_fetch_date 
             ON options_data(fetch_date)
         """)
+
+        # Serves the dashboard's "most recent rows" preview without a sort
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_options_timestamp
+            ON options_data(timestamp DESC)
+        """)
         
         # Create usage tracking table
         cursor.execute("""
@@ -215,7 +282,7 @@ class DatabaseManager:
 
         logger.info(f"Saving {len(available_columns)} columns: {available_columns}")
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
 
         try:
             # Save to database
@@ -226,7 +293,9 @@ class DatabaseManager:
                 conn,
                 if_exists='append',
                 index=False,
-                method='multi'
+                method='multi',
+                # Multi-row INSERTs, each kept under SQLite's bound-parameter limit
+                chunksize=max(1, SQLITE_MAX_VARIABLES // len(available_columns))
             )
             
             records_after = self._get_record_count(conn)
@@ -293,7 +362,7 @@ class DatabaseManager:
         Returns:
             DataFrame with latest data
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         
         query = """
             SELECT * FROM options_data
@@ -327,7 +396,7 @@ class DatabaseManager:
         Returns:
             DataFrame with historical data
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         
         query = """
             SELECT * FROM options_data
@@ -345,6 +414,53 @@ class DatabaseManager:
         conn.close()
         return df
     
+    def get_dashboard_stats(self) -> Dict:
+        """
+        Get the headline counters shown on the dashboard in one table scan
+
+        Returns:
+            Dictionary with total_records, unique_days, latest_fetch, unique_tickers
+        """
+        with self._read_lock:
+            cursor = self._get_read_connection().execute(SQL_STATS)
+            total_records, unique_days, latest_fetch, unique_tickers = cursor.fetchone()
+
+        return {
+            'total_records': total_records,
+            'unique_days': unique_days,
+            'latest_fetch': latest_fetch,
+            'unique_tickers': unique_tickers
+        }
+
+    def get_recent_options(self, limit: int = 100) -> pd.DataFrame:
+        """
+        Get the most recently stored options rows for previewing
+
+        Args:
+            limit: Maximum number of rows to return
+
+        Returns:
+            DataFrame with the preview columns, newest first
+        """
+        with self._read_lock:
+            cursor = self._get_read_connection().execute(SQL_PREVIEW, (limit,))
+            rows = cursor.fetchmany(limit)
+            columns = [description[0] for description in cursor.description]
+
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def get_average_price_by_underlying(self) -> pd.DataFrame:
+        """
+        Get the average option last price per underlying
+
+        Returns:
+            DataFrame with columns underlying and avg_px_last
+        """
+        with self._read_lock:
+            rows = self._get_read_connection().execute(SQL_AVG_BY_TICKER).fetchall()
+
+        return pd.DataFrame.from_records(rows, columns=['underlying', 'avg_px_last'])
+
     def get_summary_stats(self) -> Dict:
         """
         Get database summary statistics
@@ -352,7 +468,7 @@ class DatabaseManager:
         Returns:
             Dictionary with summary stats
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         cursor = conn.cursor()
         
         stats = {}
@@ -388,7 +504,7 @@ class DatabaseManager:
         Args:
             days_to_keep: Number of days to keep
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -403,94 +519,168 @@ class DatabaseManager:
         logger.info(f"Deleted {deleted} old records")
         return deleted
     
+    def _export_query(self,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None):
+        """Build the WHERE clause and params shared by the options_data exports"""
+        where = ""
+        params = []
+
+        if start_date and end_date:
+            where = " WHERE fetch_date BETWEEN ? AND ?"
+            params = [start_date, end_date]
+
+        return where, params
+
+    def _export_underlyings(self, conn: sqlite3.Connection, where: str, params: List) -> set:
+        """Distinct underlyings in the export range, used for filename generation"""
+        cursor = conn.execute(f"SELECT DISTINCT underlying FROM options_data{where}", params)
+        return {row[0] for row in cursor}
+
+    def _parquet_schema(self, conn: sqlite3.Connection, columns: List[str]):
+        """Arrow schema for options_data, derived from the declared column types"""
+        import pyarrow as pa
+
+        declared = {row[1]: (row[2] or '').upper()
+                    for row in conn.execute("PRAGMA table_info(options_data)")}
+
+        fields = []
+        for col in columns:
+            if col in PARQUET_DATE_COLUMNS:
+                fields.append(pa.field(col, pa.timestamp('ns')))
+            elif declared.get(col) == 'INTEGER':
+                fields.append(pa.field(col, pa.int64()))
+            elif declared.get(col) == 'REAL':
+                fields.append(pa.field(col, pa.float64()))
+            else:
+                fields.append(pa.field(col, pa.string()))
+        return pa.schema(fields)
+
     def export_to_csv(self,
                      output_path: Optional[str] = None,
                      start_date: Optional[str] = None,
                      end_date: Optional[str] = None,
-                     scope: str = 'all'):
+                     scope: str = 'all',
+                     chunk_size: int = EXPORT_CHUNK_ROWS):
         """
         Export data to CSV file with intelligent naming
 
+        Rows are streamed from SQLite in chunks, so memory use stays
+        constant regardless of table size.
+
         Args:
             output_path: Output CSV file path (auto-generated if None)
             start_date: Optional start date filter
             end_date: Optional end date filter
             scope: 'qqq_only', 'top5', 'all20', or 'all' for filename generation
+            chunk_size: Number of rows fetched and written per batch
         """
-        conn = sqlite3.connect(self.db_path)
-        
-        query = "SELECT * FROM options_data"
-        params = []
-        
-        if start_date and end_date:
-            query += " WHERE fetch_date BETWEEN ? AND ?"
-            params = [start_date, end_date]
-        
-        query += " ORDER BY fetch_date, underlying, expiry, strike"
-        
-        df = pd.read_sql_query(query, conn, params=params if params else None)
-        conn.close()
+        conn = self._get_connection()
+        where, params = self._export_query(start_date, end_date)
 
-        # Generate intelligent filename if not provided
-        if output_path is None:
-            output_path = self._generate_filename('csv', scope, df)
+        try:
+            # Generate intelligent filename if not provided
+            if output_path is None:
+                underlyings = self._export_underlyings(conn, where, params)
+                output_path = self._generate_filename('csv', scope, underlyings)
+
+            cursor = conn.execute(
+                f"SELECT * FROM options_data{where} "
+                f"ORDER BY fetch_date, underlying, expiry, strike",
+                params
+            )
 
-        df.to_csv(output_path, index=False)
-        logger.info(f"Exported {len(df)} records to {output_path}")
+            exported = 0
+            with open(output_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow([d[0] for d in cursor.description])
+
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    exported += len(rows)
+        finally:
+            conn.close()
+
+        logger.info(f"Exported {exported} records to {output_path}")
         return output_path
     
     def export_to_parquet(self,
                          output_path: Optional[str] = None,
                          start_date: Optional[str] = None,
                          end_date: Optional[str] = None,
-                         scope: str = 'all'):
+                         scope: str = 'all',
+                         chunk_size: int = EXPORT_CHUNK_ROWS):
         """
         Export data to Parquet file for efficient storage and fast access
 
+        Rows are streamed from SQLite in chunks and appended as row groups,
+        so memory use stays constant regardless of table size.
+
         Args:
             output_path: Output Parquet file path (auto-generated if None)
             start_date: Optional start date filter
             end_date: Optional end date filter
             scope: 'qqq_only', 'top5', 'all20', or 'all' for filename generation
+            chunk_size: Number of rows fetched and written per row group
         """
-        conn = sqlite3.connect(self.db_path)
-        
-        query = "SELECT * FROM options_data"
-        params = []
-        
-        if start_date and end_date:
-            query += " WHERE fetch_date BETWEEN ? AND ?"
-            params = [start_date, end_date]
-        
-        query += " ORDER BY fetch_date, underlying, expiry, strike"
-        
-        df = pd.read_sql_query(query, conn, params=params if params else None)
-        conn.close()
-        
-        # Convert date columns to proper datetime types for better Parquet compression
-        if 'fetch_date' in df.columns:
-            df['fetch_date'] = pd.to_datetime(df['fetch_date'])
-        if 'timestamp' in df.columns:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-        if 'expiry' in df.columns:
-            df['expiry'] = pd.to_datetime(df['expiry'], format='%Y%m%d')
-        
-        # Generate intelligent filename if not provided
-        if output_path is None:
-            output_path = self._generate_filename('parquet', scope, df)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
 
-        df.to_parquet(output_path, index=False, compression='snappy')
-        logger.info(f"Exported {len(df)} records to {output_path} (Parquet format)")
+        conn = self._get_connection()
+        where, params = self._export_query(start_date, end_date)
+
+        try:
+            # Generate intelligent filename if not provided
+            if output_path is None:
+                underlyings = self._export_underlyings(conn, where, params)
+                output_path = self._generate_filename('parquet', scope, underlyings)
+
+            cursor = conn.execute(
+                f"SELECT * FROM options_data{where} "
+                f"ORDER BY fetch_date, underlying, expiry, strike",
+                params
+            )
+            columns = [d[0] for d in cursor.description]
+            schema = self._parquet_schema(conn, columns)
+
+            exported = 0
+            with pq.ParquetWriter(output_path, schema, compression='snappy') as writer:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+
+                    chunk = pd.DataFrame.from_records(rows, columns=columns)
+
+                    # Convert date columns to proper datetime types for better Parquet compression
+                    if 'fetch_date' in chunk.columns:
+                        chunk['fetch_date'] = pd.to_datetime(chunk['fetch_date'])
+                    if 'timestamp' in chunk.columns:
+                        chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+                    if 'expiry' in chunk.columns:
+                        chunk['expiry'] = pd.to_datetime(chunk['expiry'], format='%Y%m%d')
+
+                    writer.write_table(
+                        pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                    )
+                    exported += len(rows)
+        finally:
+            conn.close()
+
+        logger.info(f"Exported {exported} records to {output_path} (Parquet format)")
         return output_path
 
-    def _generate_filename(self, format_type: str, scope: str, df: pd.DataFrame) -> str:
+    def _generate_filename(self, format_type: str, scope: str, underlyings: set) -> str:
         """
         Generate intelligent filename based on data content
 
         Args:
             format_type: 'csv' or 'parquet'
             scope: 'qqq_only', 'top5', 'all20', or 'all'
-            df: DataFrame to analyze for content
+            underlyings: Distinct underlyings in the exported data
 
         Returns:
             Generated filename path
@@ -501,14 +691,12 @@ class DatabaseManager:
         today = datetime.now().strftime('%Y-%m-%d')
 
         # Analyze data content to determine actual scope if 'all'
-        if scope == 'all' and not df.empty:
-            unique_underlyings = set(df['underlying'].unique()) if 'underlying' in df.columns else set()
-
-            if len(unique_underlyings) == 1 and 'QQQ' in unique_underlyings:
+        if scope == 'all' and underlyings:
+            if len(underlyings) == 1 and 'QQQ' in underlyings:
                 scope = 'qqq_only'
-            elif len(unique_underlyings) <= 6:  # QQQ + 5 constituents
+            elif len(underlyings) <= 6:  # QQQ + 5 constituents
                 scope = 'top5'
-            elif len(unique_underlyings) >= 15:  # QQQ + most/all constituents
+            elif len(underlyings) >= 15:  # QQQ + most/all constituents
                 scope = 'all20'
 
         # Generate filename based on scope
@@ -539,7 +727,7 @@ class DatabaseManager:
             start_date: Optional start date filter
             end_date: Optional end date filter
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         
         query = "SELECT * FROM constituent_options"
         params = []
@@ -6,12 +6,14 @@ Manages historical EOD Greeks database with SQLite
 
 import sqlite3
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import logging
 import os
 from pathlib import Path
 
+from .trading_calendar import trading_days
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -327,20 +329,8 @@ class GreeksDatabase:
         existing_dates = set(row[0] for row in cursor.fetchall())
         conn.close()
 
-        # Generate all trading days in range
-        trading_days = []
-        current = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
-
-        while current <= end:
-            # Skip weekends
-            if current.weekday() < 5:
-                date_str = current.strftime("%Y-%m-%d")
-                if date_str not in existing_dates:
-                    trading_days.append(date_str)
-            current += timedelta(days=1)
-
-        return trading_days
+        # All trading days in range (weekends and, when available, NYSE holidays excluded)
+        return [day for day in trading_days(start_date, end_date) if day not in existing_dates]
 
     def get_database_stats(self) -> Dict:
         """Get database statistics"""
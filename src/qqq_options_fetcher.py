@@ -7,7 +7,7 @@ Specialized fetcher for QQQ options with smart strike selection
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 import logging
 import yaml
 import os
@@ -368,6 +368,32 @@ class QQQOptionsFetcher:
         Returns:
             DataFrame with historical options data including Greeks
         """
+        all_data = list(self.iter_historical_options(start_date, end_date, expiries))
+
+        # Combine all data
+        if all_data:
+            return pd.concat(all_data, ignore_index=True)
+
+        return pd.DataFrame()
+
+    def iter_historical_options(self,
+                                start_date: str,
+                                end_date: str,
+                                expiries: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield historical options data one expiry at a time
+
+        Same data as fetch_historical_options, but each expiry's frame keeps its
+        date index and can be processed and released before the next is fetched.
+
+        Args:
+            start_date: Start date (YYYYMMDD)
+            end_date: End date (YYYYMMDD)
+            expiries: List of expiry dates (will generate if not provided)
+
+        Yields:
+            Non-empty DataFrame per expiry, in Bloomberg historical format
+        """
         if not self.api.connected:
             self.api.connect()
 
@@ -375,8 +401,6 @@ class QQQOptionsFetcher:
         if expiries is None:
             expiries = self.get_expiry_dates()
 
-        all_data = []
-
         for expiry in expiries:
             logger.info(f"Fetching historical data for expiry {expiry}")
 
@@ -484,18 +508,12 @@ class QQQOptionsFetcher:
                 except Exception as e:
                     logger.warning(f"Error calculating Greeks: {e}")
 
-            if not historical_data.empty:
-                historical_data['expiry'] = expiry
-                all_data.append(historical_data)
-
             # Update usage monitor
             self.monitor.record_usage(len(historical_data) * 11)
 
-        # Combine all data
-        if all_data:
-            return pd.concat(all_data, ignore_index=True)
-
-        return pd.DataFrame()
+            if not historical_data.empty:
+                historical_data['expiry'] = expiry
+                yield historical_data
     
     def _get_atm_strikes(self, 
                         spot: float, 
@@ -659,7 +677,29 @@ class QQQOptionsFetcher:
             df_copy = df.copy()
             if 'fetch_time' in df_copy.columns:
                 df_copy['fetch_time'] = pd.to_datetime(df_copy['fetch_time'])
-            df_copy.to_parquet(filepath, index=False, compression='snappy')
+
+            # Sorting clusters rows so row-group min/max statistics are tight and
+            # readers filtering on these columns can skip most row groups
+            sort_by = [c for c in config.get('sort_by', []) if c in df_copy.columns]
+            if sort_by:
+                df_copy = df_copy.sort_values(sort_by, kind='stable', ignore_index=True)
+
+            # Compression and layout come from the output config (snappy by default)
+            parquet_options = {}
+            for key in ('compression_level', 'row_group_size', 'data_page_size'):
+                if key in config:
+                    parquet_options[key] = config[key]
+            if config.get('byte_stream_split'):
+                # Byte-stream-split makes float columns far more compressible; it only
+                # applies where dictionary encoding is off, so floats are excluded from it
+                float_columns = [c for c in df_copy.columns if df_copy[c].dtype.kind == 'f']
+                parquet_options['use_byte_stream_split'] = float_columns
+                parquet_options['use_dictionary'] = [c for c in df_copy.columns
+                                                     if c not in float_columns]
+
+            df_copy.to_parquet(filepath, index=False,
+                               compression=config.get('compression', 'snappy'),
+                               **parquet_options)
             logger.info(f"Data saved to {filepath}")
 
         elif output_format == 'excel':
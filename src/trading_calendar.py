@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Trading Calendar
+US equity trading days, with NYSE holidays when pandas_market_calendars is installed
+"""
+
+import pandas as pd
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Try to import the exchange calendar (optional: without it only weekends are skipped)
+try:
+    import pandas_market_calendars as mcal
+    MARKET_CALENDARS_AVAILABLE = True
+except ImportError:
+    MARKET_CALENDARS_AVAILABLE = False
+
+
+@lru_cache(maxsize=1)
+def _holidays() -> FrozenSet[str]:
+    """NYSE holidays as 'YYYY-MM-DD' strings, computed once per process"""
+    if not MARKET_CALENDARS_AVAILABLE:
+        logger.info("pandas_market_calendars not installed; treating all weekdays as trading days")
+        return frozenset()
+
+    holidays = mcal.get_calendar('NYSE').holidays().holidays
+    return frozenset(pd.DatetimeIndex(holidays).strftime('%Y-%m-%d'))
+
+
+def trading_days(start_date: str, end_date: str) -> List[str]:
+    """
+    Trading days between two dates, inclusive
+
+    Args:
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+
+    Returns:
+        List of 'YYYY-MM-DD' strings in ascending order
+    """
+    days = pd.bdate_range(start_date, end_date, freq='C', holidays=sorted(_holidays()))
+    return days.strftime('%Y-%m-%d').tolist()
+
+
+def is_trading_day(day: datetime) -> bool:
+    """Check whether a date is a trading day"""
+    return day.weekday() < 5 and day.strftime('%Y-%m-%d') not in _holidays()
+
+
+def previous_trading_day(day: datetime) -> datetime:
+    """Most recent trading day strictly before the given date"""
+    previous = day - timedelta(days=1)
+    while not is_trading_day(previous):
+        previous -= timedelta(days=1)
+    return previous
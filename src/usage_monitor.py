@@ -131,20 +131,23 @@ class UsageMonitor:
         }
     
     def print_usage_report(self):
-        """Print usage report"""
+        """Log usage report"""
         quota = self.get_remaining_quota()
-        
-        print("\n" + "="*60)
-        print("BLOOMBERG API USAGE REPORT")
-        print("="*60)
-        print(f"Daily:   {quota['daily_used']:,} / {quota['daily_limit']:,} "
-              f"({quota['daily_used']/quota['daily_limit']*100:.1f}%)")
-        print(f"Monthly: {quota['monthly_used']:,} / {quota['monthly_limit']:,} "
-              f"({quota['monthly_used']/quota['monthly_limit']*100:.1f}%)")
-        print("-"*60)
-        print(f"Daily Remaining:   {quota['daily_remaining']:,}")
-        print(f"Monthly Remaining: {quota['monthly_remaining']:,}")
-        print("="*60)
+
+        # Logged rather than printed, so in-process dashboard fetches show it too
+        logger.info("\n".join([
+            "=" * 60,
+            "BLOOMBERG API USAGE REPORT",
+            "=" * 60,
+            f"Daily:   {quota['daily_used']:,} / {quota['daily_limit']:,} "
+            f"({quota['daily_used']/quota['daily_limit']*100:.1f}%)",
+            f"Monthly: {quota['monthly_used']:,} / {quota['monthly_limit']:,} "
+            f"({quota['monthly_used']/quota['monthly_limit']*100:.1f}%)",
+            "-" * 60,
+            f"Daily Remaining:   {quota['daily_remaining']:,}",
+            f"Monthly Remaining: {quota['monthly_remaining']:,}",
+            "=" * 60,
+        ]))
     
     def reset_daily_usage(self):
         """Reset daily usage (for testing)"""